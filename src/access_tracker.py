@@ -7,9 +7,36 @@ Sambaの監査ログをリアルタイムで監視し、最終アクセス時刻
 
 import json
 import logging
+import os
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import NamedTuple, Optional
+
+
+class AccessSnapshot(NamedTuple):
+    """
+    ある時点の最終アクセス時刻と経過日数
+
+    1回のチェック中は同じ値を使い回し、状態ファイルを読み直さない。
+    """
+
+    last_access: Optional[datetime]
+    now: datetime
+    days: Optional[int]
+
+    def deletion_date(self, inactivity_days: int) -> Optional[datetime]:
+        """
+        データ削除予定日時を計算
+
+        Args:
+            inactivity_days: 非アクティブ期間（日数）
+
+        Returns:
+            削除予定日時、アクセス履歴がない場合はNone
+        """
+        if self.last_access is None:
+            return None
+        return self.last_access + timedelta(days=inactivity_days)
 
 
 class AccessTracker:
@@ -29,6 +56,13 @@ class AccessTracker:
         self.state_file = Path(state_file)
         self.logger = logging.getLogger(__name__)
 
+        # 最終アクセス時刻のキャッシュ（状態ファイルのmtimeで無効化）
+        self._cached_dt: Optional[datetime] = None
+        self._cached_mtime_ns: int = -1
+
+        # 状態ファイルのディレクトリ（rename後のfsync用に開いたまま保持）
+        self._dir_fd: Optional[int] = None
+
         # 状態ファイルのディレクトリを作成
         self.state_file.parent.mkdir(parents=True, exist_ok=True)
 
@@ -39,17 +73,49 @@ class AccessTracker:
         Returns:
             最終アクセス時刻（datetime）、存在しない場合はNone
         """
-        if not self.state_file.exists():
+        try:
+            stat = self.state_file.stat()
+        except FileNotFoundError:
+            self._invalidate_cache()
             return None
 
+        # 外部から書き換えられていなければキャッシュを返す
+        if stat.st_mtime_ns == self._cached_mtime_ns:
+            return self._cached_dt
+
         try:
-            with open(self.state_file, 'r') as f:
-                data = json.load(f)
-                return datetime.fromisoformat(data['last_access'])
+            with open(self.state_file, 'rb') as f:
+                # 読み込んだ内容と同じファイルのmtimeをキャッシュキーにする
+                mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+                data = json.loads(f.read())
+            last_access = datetime.fromisoformat(data['last_access'])
+        except FileNotFoundError:
+            # stat後に削除された
+            self._invalidate_cache()
+            return None
         except (json.JSONDecodeError, KeyError, ValueError) as e:
             self.logger.error(f"Failed to read last access time: {e}")
             return None
 
+        self._set_cache(last_access, mtime_ns)
+        return last_access
+
+    def _set_cache(self, last_access: datetime, mtime_ns: int):
+        """
+        最終アクセス時刻をキャッシュ
+
+        Args:
+            last_access: 最終アクセス時刻
+            mtime_ns: 状態ファイルの更新時刻
+        """
+        self._cached_dt = last_access
+        self._cached_mtime_ns = mtime_ns
+
+    def _invalidate_cache(self):
+        """最終アクセス時刻のキャッシュを破棄"""
+        self._cached_dt = None
+        self._cached_mtime_ns = -1
+
     def update_access(self, access_time: Optional[datetime] = None):
         """
         アクセス時刻を更新
@@ -57,66 +123,121 @@ class AccessTracker:
         Args:
             access_time: 記録する時刻（Noneの場合は現在時刻）
         """
+        now = datetime.now()
         if access_time is None:
-            access_time = datetime.now()
+            access_time = now
 
         data = {
             'last_access': access_time.isoformat(),
-            'timestamp': int(access_time.timestamp()),
-            'updated_at': datetime.now().isoformat()
+            'updated_at': now.isoformat()
         }
 
         try:
-            # アトミック書き込み
+            # アトミック書き込み（書き込み→fsync→rename→ディレクトリfsync）
             temp_file = self.state_file.with_suffix('.tmp')
-            with open(temp_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            temp_file.replace(self.state_file)
-
-            self.logger.info(f"Updated last access time: {access_time.isoformat()}")
+            with open(temp_file, 'wb') as f:
+                f.write(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+                # renameではmtimeは変わらないため、ここで取得しておく
+                mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            os.replace(temp_file, self.state_file)
+            self._fsync_parent_dir()
+
+            self._set_cache(access_time, mtime_ns)
+
+            self.logger.info("Updated last access time: %s", access_time.isoformat())
         except Exception as e:
+            self._invalidate_cache()
             self.logger.error(f"Failed to update access time: {e}")
             raise
 
-    def days_since_last_access(self) -> Optional[int]:
+    def _fsync_parent_dir(self):
+        """状態ファイルのディレクトリをfsyncしてrenameを永続化"""
+        if self._dir_fd is None:
+            try:
+                # 書き込みのたびに開き直さないよう保持しておく
+                self._dir_fd = os.open(str(self.state_file.parent), os.O_DIRECTORY)
+            except OSError as e:
+                self.logger.debug(f"Could not open state directory for fsync: {e}")
+                return
+
+        try:
+            os.fsync(self._dir_fd)
+        except OSError as e:
+            # fsyncを拒否するファイルシステムもある
+            self.logger.debug(f"Directory fsync not supported: {e}")
+
+    def snapshot(self) -> AccessSnapshot:
+        """
+        最終アクセス時刻を一度だけ読み込み、現在時刻・経過日数と合わせて返す
+
+        Returns:
+            AccessSnapshot
+        """
+        last_access = self.get_last_access()
+        now = datetime.now()
+        days = (now - last_access).days if last_access is not None else None
+        return AccessSnapshot(last_access, now, days)
+
+    def days_since_last_access(
+        self,
+        last_access: Optional[datetime] = None
+    ) -> Optional[int]:
         """
         最終アクセスからの経過日数を計算
 
+        Args:
+            last_access: 取得済みの最終アクセス時刻（Noneの場合は読み込む）
+
         Returns:
             経過日数（int）、アクセス履歴がない場合はNone
         """
-        last_access = self.get_last_access()
         if last_access is None:
-            return None
+            # 監視ループと同じ計算を使う
+            return self.snapshot().days
 
         delta = datetime.now() - last_access
         return delta.days
 
-    def hours_since_last_access(self) -> Optional[float]:
+    def hours_since_last_access(
+        self,
+        last_access: Optional[datetime] = None
+    ) -> Optional[float]:
         """
         最終アクセスからの経過時間（時間単位）を計算
 
+        Args:
+            last_access: 取得済みの最終アクセス時刻（Noneの場合は読み込む）
+
         Returns:
             経過時間（float）、アクセス履歴がない場合はNone
         """
-        last_access = self.get_last_access()
+        if last_access is None:
+            last_access = self.get_last_access()
         if last_access is None:
             return None
 
         delta = datetime.now() - last_access
         return delta.total_seconds() / 3600
 
-    def get_deletion_date(self, inactivity_days: int = 30) -> Optional[datetime]:
+    def get_deletion_date(
+        self,
+        inactivity_days: int = 30,
+        last_access: Optional[datetime] = None
+    ) -> Optional[datetime]:
         """
         データ削除予定日時を計算
 
         Args:
             inactivity_days: 非アクティブ期間（日数）
+            last_access: 取得済みの最終アクセス時刻（Noneの場合は読み込む）
 
         Returns:
             削除予定日時、アクセス履歴がない場合はNone
         """
-        last_access = self.get_last_access()
+        if last_access is None:
+            last_access = self.get_last_access()
         if last_access is None:
             return None
 
@@ -124,34 +245,33 @@ class AccessTracker:
 
     def should_send_warning(
         self,
+        days: int,
         warning_day: int,
+        next_warning_day: Optional[int],
         notification_state: dict
     ) -> bool:
         """
         指定された警告日に通知すべきかチェック
 
         Args:
+            days: 最終アクセスからの経過日数
             warning_day: 警告日（例：23日目）
+            next_warning_day: 次の警告日または削除日（Noneの場合は上限なし）
             notification_state: 通知状態辞書
 
         Returns:
             通知すべき場合True
         """
-        days = self.days_since_last_access()
-        if days is None:
-            return False
-
         # まだ警告日に到達していない
         if days < warning_day:
             return False
 
-        # 既に次の警告日を過ぎている（送信済みとみなす）
-        if days > warning_day:
+        # 既に次の警告日に到達している（次の警告で通知する）
+        if next_warning_day is not None and days >= next_warning_day:
             return False
 
-        # この警告日で既に送信済みかチェック
-        warning_key = f"warning_{warning_day}"
-        if notification_state.get(warning_key, {}).get('sent', False):
+        # この警告日で既に送信済みかチェック（ビット位置=警告日）
+        if notification_state.get('sent_mask', 0) & (1 << warning_day):
             return False
 
         return True
@@ -167,6 +287,9 @@ class AccessTracker:
 
     def delete_state_file(self):
         """状態ファイルを削除"""
-        if self.state_file.exists():
+        self._invalidate_cache()
+        try:
             self.state_file.unlink()
-            self.logger.info("State file deleted")
+        except FileNotFoundError:
+            return
+        self.logger.info("State file deleted")
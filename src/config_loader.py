@@ -5,10 +5,31 @@
 JSON形式の設定ファイルを読み込み、デフォルト値を提供する。
 """
 
+import copy
+import functools
 import json
 import logging
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List
+
+
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """
+    設定ファイルを読み込む（パスとmtimeでキャッシュ）
+
+    返した辞書はキャッシュと共有されるため、呼び出し側で変更しないこと
+    （_deep_merge は値をコピーするため、そのまま渡してよい）。
+
+    Args:
+        path: 設定ファイルのパス
+        mtime_ns: 設定ファイルの更新時刻（キャッシュキー）
+
+    Returns:
+        ユーザー設定辞書
+    """
+    with open(path, 'rb') as f:
+        return json.loads(f.read())
 
 
 class ConfigLoader:
@@ -56,25 +77,20 @@ class ConfigLoader:
         Returns:
             設定辞書
         """
-        # デフォルト設定をコピー
-        config = self.DEFAULT_CONFIG.copy()
+        config = None
+
+        try:
+            mtime_ns = self.config_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = -1
 
         # 設定ファイルが存在する場合は読み込み
-        if self.config_file.exists():
+        if mtime_ns != -1:
             try:
-                with open(self.config_file, 'r') as f:
-                    user_config = json.load(f)
+                user_config = _load_config_cached(str(self.config_file), mtime_ns)
 
-                # デフォルト設定に上書き
-                config.update(user_config)
-
-                # notification設定は深くマージ
-                if 'notification' in user_config:
-                    config['notification'].update(user_config['notification'])
-                    if 'email' in user_config.get('notification', {}):
-                        config['notification']['email'].update(
-                            user_config['notification']['email']
-                        )
+                # デフォルト設定に深くマージ
+                config = self._deep_merge(self.DEFAULT_CONFIG, user_config)
 
                 self.logger.info(f"Loaded configuration from {self.config_file}")
             except json.JSONDecodeError as e:
@@ -88,8 +104,36 @@ class ConfigLoader:
                 f"Config file not found: {self.config_file}, using defaults"
             )
 
+        if config is None:
+            # デフォルト設定をコピー（ネストした辞書を共有しないよう深くコピー）
+            config = copy.deepcopy(self.DEFAULT_CONFIG)
+
+        # よく参照される通知設定を保持しておく
+        self._notification = config.get('notification') or {}
+        self._email = self._notification.get('email') or {}
+
         return config
 
+    @staticmethod
+    def _deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        辞書を再帰的にマージ
+
+        Args:
+            base: ベースとなる辞書（変更されない）
+            override: 上書きする辞書
+
+        Returns:
+            マージ後の新しい辞書
+        """
+        merged = copy.deepcopy(base)
+        for key, value in override.items():
+            if isinstance(value, dict) and isinstance(merged.get(key), dict):
+                merged[key] = ConfigLoader._deep_merge(merged[key], value)
+            else:
+                merged[key] = copy.deepcopy(value)
+        return merged
+
     def get(self, key: str, default: Any = None) -> Any:
         """
         設定値を取得
@@ -105,15 +149,15 @@ class ConfigLoader:
 
     def get_notification_config(self) -> Dict[str, Any]:
         """通知設定を取得"""
-        return self.config.get('notification', {})
+        return self._notification
 
     def get_email_config(self) -> Dict[str, Any]:
         """メール設定を取得"""
-        return self.config.get('notification', {}).get('email', {})
+        return self._email
 
     def is_notification_enabled(self) -> bool:
         """通知が有効かどうか"""
-        return self.config.get('notification', {}).get('enabled', False)
+        return self._notification.get('enabled', False)
 
     def get_warning_days(self) -> List[int]:
         """警告日のリストを取得"""
@@ -5,11 +5,18 @@
 NAS監視システム全体で使用する統一的なログ設定を提供する。
 """
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 
+# ハンドラへの書き込みを行うバックグラウンドリスナー
+_listener = None
+
+
 def setup_logging(
     log_level=logging.INFO,
     log_file=None,
@@ -18,11 +25,19 @@ def setup_logging(
     """
     ロギングをセットアップする
 
+    ログ出力はキュー経由でバックグラウンドスレッドが書き込むため、
+    呼び出し側のスレッドがファイル書き込みでブロックされない。
+
     Args:
         log_level: ログレベル (デフォルト: INFO)
         log_file: ログファイルパス (Noneの場合はstdoutのみ)
         log_format: ログフォーマット文字列
     """
+    global _listener
+
+    # 既存のリスナーを停止
+    stop_logging()
+
     # ルートロガーを取得
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
@@ -37,7 +52,7 @@ def setup_logging(
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers = [console_handler]
 
     # ファイルハンドラ（指定されている場合）
     if log_file:
@@ -47,11 +62,31 @@ def setup_logging(
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(log_level)
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    # ルートロガーにはキューハンドラのみを設定し、実際の出力はリスナーが行う
+    log_queue = queue.Queue(-1)
+    root_logger.addHandler(QueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
 
     return root_logger
 
 
+def stop_logging():
+    """キューに残ったログを書き出してリスナーを停止する"""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# 終了時にキューに残ったログを確実に書き出す
+atexit.register(stop_logging)
+
+
 def get_logger(name):
     """
     指定された名前のロガーを取得
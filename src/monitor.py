@@ -6,18 +6,105 @@ Sambaログを監視し、30日間アクセスがない場合にセキュア消
 23, 27, 29日目に段階的な警告メールを送信する。
 """
 
+import bisect
+import ctypes
+import ctypes.util
+import os
+import selectors
 import signal
+import struct
 import subprocess
 import sys
 import time
 import logging
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Optional
 
-from access_tracker import AccessTracker
+from access_tracker import AccessSnapshot, AccessTracker
 from secure_wipe import SecureWiper
 from notifier import EmailNotifier
 from config_loader import ConfigLoader
-from logger import setup_logging
+from logger import setup_logging, stop_logging
+
+
+# inotifyイベントマスク（<sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+
+_INOTIFY_EVENT = struct.Struct('iIII')
+
+# mlockallフラグ（<sys/mman.h>）
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+MCL_ONFAULT = 4
+
+
+class Inotify:
+    """
+    inotifyの最小ラッパー
+
+    libcのinotify_init1/inotify_add_watchをctypes経由で呼び出す。
+    """
+
+    def __init__(self):
+        """inotifyインスタンスを作成（非ブロッキング）"""
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.fd = fd
+
+    def fileno(self) -> int:
+        """ファイルディスクリプタを取得"""
+        return self.fd
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """
+        監視対象を追加
+
+        Args:
+            path: 監視するパス
+            mask: イベントマスク
+
+        Returns:
+            ウォッチディスクリプタ
+        """
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        """監視対象を削除（削除済みの場合は無視）"""
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self) -> int:
+        """
+        保留中のイベントをすべて読み捨てる
+
+        Returns:
+            受信したイベントマスクの論理和
+        """
+        mask = 0
+        while True:
+            try:
+                buf = os.read(self.fd, 4096)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + _INOTIFY_EVENT.size <= len(buf):
+                _, event_mask, _, name_len = _INOTIFY_EVENT.unpack_from(buf, offset)
+                mask |= event_mask
+                offset += _INOTIFY_EVENT.size + name_len
+        return mask
+
+    def close(self):
+        """ファイルディスクリプタを閉じる"""
+        os.close(self.fd)
 
 
 class NASMonitor:
@@ -27,6 +114,27 @@ class NASMonitor:
     アクセス監視、通知送信、セキュア消去を統合管理する。
     """
 
+    # Sambaログの1回あたりの読み込みサイズ
+    READ_CHUNK_SIZE = 64 * 1024
+
+    # アクセス時刻を状態ファイルに書き込む最小間隔（秒）
+    ACCESS_FLUSH_INTERVAL = 1.0
+
+    # inotify通知後、連続する追記をまとめるために待つ時間（秒）
+    LOG_COALESCE_DELAY = 0.01
+
+    # inotifyが使えない場合・ローテーション待ちのポーリング間隔（秒）
+    LOG_POLL_INTERVAL = 1.0
+
+    # 読み終えたSambaログをページキャッシュから解放する単位（バイト）
+    LOG_DROP_CACHE_SIZE = 4 * 1024 * 1024
+
+    # 定期チェックの間隔（秒）
+    CHECK_INTERVAL = 1 * 60 * 60  # 1時間
+
+    # デーモン自身のnice値の増分（Sambaより優先度を下げる）
+    NICE_INCREMENT = 10
+
     def __init__(self, config_file: str = '/etc/nas-monitor/config.json'):
         """
         初期化
@@ -48,6 +156,9 @@ class NASMonitor:
         self.share_name = self.config.get('share_name', 'secure_share')
         self.logger.info(f"Monitoring share: {self.share_name}")
 
+        # ログ行の照合はデコードせずバイト列のまま行う
+        self._share_needle = self.share_name.encode('utf-8')
+
         # キーファイルが存在しない場合は削除済みとみなす
         keyfile_path = Path(self.config.get('keyfile'))
         if not keyfile_path.exists():
@@ -83,9 +194,39 @@ class NASMonitor:
 
         # パラメータ
         self.inactivity_days = self.config.get('inactivity_days', 30)
-        self.warning_days = sorted(self.config.get_warning_days())
+        self.warning_days = tuple(sorted(self.config.get_warning_days()))
         self.reboot_after_wipe = self.config.get('reboot_after_wipe', True)
 
+        # チェックが必要になる経過日数（警告日と削除日）
+        self._schedule_days = tuple(sorted(set(self.warning_days) | {self.inactivity_days}))
+
+        # これより前は何もする必要がない経過日数（最初の警告日、通知なしなら削除日）
+        if self.notifier and self.warning_days:
+            self._first_action_day = min(self.warning_days[0], self.inactivity_days)
+        else:
+            self._first_action_day = self.inactivity_days
+
+        # Sambaログ監視用inotify
+        self._inotify = self._create_inotify()
+
+        # Sambaログの追跡状態
+        self._log_path: Optional[Path] = None
+        self._log_file = None
+        self._log_wd: Optional[int] = None
+        self._log_pending = b''
+        self._log_dropped = 0
+
+        # inotify通知を受けてから読み込むまでの保留状態（連続する追記をまとめる）
+        self._log_event_mask = 0
+        self._log_drain_at: Optional[float] = None
+
+        # 連続アクセス時の書き込みをまとめるための保留状態
+        self._pending_access: Optional[datetime] = None
+        self._last_flush_monotonic = 0.0
+
+        # 直近のチェックで取得したアクセス状態（消去時のログ・通知に使う）
+        self._last_snapshot: Optional[AccessSnapshot] = None
+
         # 実行フラグ
         self.running = True
 
@@ -98,58 +239,366 @@ class NASMonitor:
         self.logger.info(f"Received signal {signum}, shutting down gracefully...")
         self.running = False
 
-    def monitor_samba_log(self, log_file: str = '/var/log/samba/audit.log'):
+    def _lower_priority(self):
+        """
+        デーモンを1コアに固定し、スケジューリング優先度を下げる
+
+        ほぼ待機しているだけのため、起床ごとのコア移動を避け、
+        アクセス中のSambaにCPUを譲る。失敗しても監視は継続する。
         """
-        Sambaログを監視してアクセスを検出
+        try:
+            # 使用可能なコアのうち最も番号の大きいコアに固定
+            cpu = max(os.sched_getaffinity(0))
+            os.sched_setaffinity(0, {cpu})
+            self.logger.info(f"Pinned monitor to CPU {cpu}")
+        except (AttributeError, OSError, ValueError) as e:
+            self.logger.debug(f"Could not set CPU affinity: {e}")
+
+        try:
+            niceness = os.nice(self.NICE_INCREMENT)
+            self.logger.info(f"Monitor niceness set to {niceness}")
+        except OSError as e:
+            self.logger.debug(f"Could not change niceness: {e}")
+
+    def _lock_memory(self):
+        """
+        プロセスのメモリをロックしてスワップアウトを防ぐ
+
+        数週間待機した後に削除処理を実行する際、SDカードからの
+        ページインを待たずに済むようにする。失敗しても監視は継続する。
+        MemoryMax（サービス設定）を超えないよう、マップ済みの全ページを
+        読み込むのではなく、実際に触れたページだけをロックする（MCL_ONFAULT）。
+        消去処理のライブラリは呼び出し前に SecureWiper.prefault() で読み込んでおく。
+        """
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            if libc.mlockall(MCL_CURRENT | MCL_FUTURE | MCL_ONFAULT) != 0:
+                errno = ctypes.get_errno()
+                self.logger.warning(f"mlockall failed: {os.strerror(errno)}")
+                return
+        except (OSError, AttributeError) as e:
+            self.logger.debug(f"mlockall unavailable: {e}")
+            return
+
+        self.logger.info("Locked monitor memory into RAM")
+
+    def _create_inotify(self) -> Optional['Inotify']:
+        """
+        ログ監視用のinotifyインスタンスを作成
+
+        Returns:
+            Inotifyインスタンス、利用できない場合はNone
+        """
+        try:
+            return Inotify()
+        except OSError as e:
+            self.logger.warning(f"inotify unavailable, falling back to polling: {e}")
+            return None
+
+    def _handle_log_line(self, line: bytes):
+        """
+        Samba監査ログの1行を処理
+
+        Args:
+            line: ログ行（バイト列）
+        """
+        # アクセスログが記録されたらアクセス時刻を更新
+        # Sambaのfull_auditログには共有名が含まれる
+        if self._share_needle not in line:
+            return
+
+        # デコードは一致した行かつDEBUG有効時のみ
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Access detected: %s", line.strip().decode('utf-8', 'replace'))
+
+        snap = self.tracker.snapshot()
+
+        # 既に保留中のアクセスがある場合はタイマーがリセット済み
+        if self._pending_access is None:
+            # 警告期間中（最初の警告日以降）の場合、キャンセル通知を送信
+            if snap.days is not None and len(self.warning_days) > 0:
+                first_warning_day = self.warning_days[0]
+                if snap.days >= first_warning_day and self.notifier:
+                    try:
+                        self.notifier.send_deletion_cancelled_notification()
+                        self.logger.info("Deletion cancelled notification sent")
+                    except Exception as e:
+                        self.logger.error("Failed to send cancellation notification: %s", e)
+
+        # アクセス時刻を更新（短時間に連続する場合はまとめて書き込む）
+        self._pending_access = snap.now
+        if time.monotonic() - self._last_flush_monotonic >= self.ACCESS_FLUSH_INTERVAL:
+            self._flush_pending_access()
+
+    def _flush_pending_access(self):
+        """保留中のアクセス時刻を状態ファイルに書き込み、通知状態をリセット"""
+        if self._pending_access is None:
+            return
+
+        # アクセス時刻を更新
+        # 書き込めない場合（ディスク満杯・読み取り専用など）も監視は止めず、
+        # 保留したまま次の書き込み間隔で再試行する
+        self._last_flush_monotonic = time.monotonic()
+        try:
+            self.tracker.update_access(self._pending_access)
+        except OSError as e:
+            self.logger.error(f"Failed to record access, will retry: {e}")
+            return
+        self._pending_access = None
+
+        # 通知状態をリセット
+        if self.notifier:
+            self.notifier.reset_notification_state()
+
+    def _handle_log_chunk(self, data: bytes) -> bytes:
+        """
+        読み込んだログから共有名を含む行を探して処理
+
+        行単位に分割せず、データ全体に対して共有名を検索し、
+        一致した行だけを切り出す。
+
+        Args:
+            data: 前回の未完了行を連結したログデータ
+
+        Returns:
+            改行で終わっていない末尾の未完了行
+        """
+        # 改行で終わる部分のみを対象にする
+        end = data.rfind(b'\n') + 1
+        needle = self._share_needle
+
+        pos = data.find(needle, 0, end)
+        while pos != -1:
+            start = data.rfind(b'\n', 0, pos) + 1
+            stop = data.find(b'\n', pos)
+            self._handle_log_line(data[start:stop])
+            pos = data.find(needle, stop + 1, end)
+
+        return data[end:]
+
+    def _start_log_monitor(self, log_file: str = '/var/log/samba/audit.log') -> bool:
+        """
+        Sambaログの監視を開始
 
         Args:
             log_file: Samba監査ログのパス
+
+        Returns:
+            監視を開始できた場合True
         """
         log_path = Path(log_file)
 
         if not log_path.exists():
             self.logger.warning(f"Samba audit log not found: {log_file}")
             self.logger.warning("Access tracking will rely on periodic checks only")
+            return False
+
+        self._log_path = log_path
+        if not self._open_samba_log(seek_end=True):
+            return False
+
+        self.logger.info(f"Monitoring Samba log: {log_file}")
+        return True
+
+    def _open_samba_log(self, seek_end: bool) -> bool:
+        """
+        Sambaログを開いてinotifyの監視対象に追加
+
+        Args:
+            seek_end: ファイル末尾から読み始める場合True
+
+        Returns:
+            開けた場合True（ローテーション直後でファイルがない場合False）
+        """
+        # 読み込みのたびにatimeが更新されないようO_NOATIMEで開く
+        # （O_NOATIMEはファイル所有者かCAP_FOWNERが必要）
+        flags = os.O_RDONLY | os.O_CLOEXEC
+        try:
+            try:
+                fd = os.open(str(self._log_path), flags | getattr(os, 'O_NOATIME', 0))
+            except PermissionError:
+                fd = os.open(str(self._log_path), flags)
+        except FileNotFoundError:
+            return False
+
+        # 読み込みは自前でまとめて行うため、バッファなしで開く
+        f = os.fdopen(fd, 'rb', buffering=0)
+
+        # 先頭から順に一度だけ読むことをカーネルに伝える
+        self._fadvise(fd, 0, 0, 'POSIX_FADV_SEQUENTIAL')
+
+        if seek_end:
+            # ファイル末尾に移動
+            f.seek(0, 2)
+
+        self._log_file = f
+        self._log_pending = b''
+        self._log_dropped = 0
+
+        if self._inotify is not None:
+            try:
+                self._log_wd = self._inotify.add_watch(
+                    str(self._log_path), IN_MODIFY | IN_MOVE_SELF | IN_DELETE_SELF
+                )
+            except OSError as e:
+                self.logger.error(f"Failed to watch Samba log: {e}")
+                self._log_wd = None
+
+        return True
+
+    def _close_samba_log(self):
+        """Sambaログを閉じる（未完了の末尾行も処理する）"""
+        if self._log_file is None:
             return
 
+        if self._log_pending:
+            self._handle_log_line(self._log_pending)
+            self._log_pending = b''
+
+        if self._log_wd is not None:
+            self._inotify.rm_watch(self._log_wd)
+            self._log_wd = None
+
+        self._log_file.close()
+        self._log_file = None
+
+    def _drain_samba_log(self):
+        """Sambaログの追記分をすべて読み込んで処理"""
+        f = self._log_file
+
+        # copytruncate方式のローテーションで切り詰められた場合
+        if f.tell() > os.fstat(f.fileno()).st_size:
+            self.logger.info("Samba log truncated, reading from start")
+            f.seek(0)
+            self._log_pending = b''
+            self._log_dropped = 0
+
+        # 追記分をまとめて読み込み、行単位に分割して処理
+        # 要求サイズに満たない読み込みは末尾に到達したことを意味するため、
+        # 通常は1回のread()で追記分を読み切る
+        while True:
+            chunk = f.read(self.READ_CHUNK_SIZE)
+            if chunk:
+                self._log_pending = self._handle_log_chunk(self._log_pending + chunk)
+            if len(chunk) < self.READ_CHUNK_SIZE:
+                break
+
+        # 読み終えた範囲は再読しないため、一定量ごとにページキャッシュから解放
+        pos = f.tell()
+        if pos - self._log_dropped >= self.LOG_DROP_CACHE_SIZE:
+            self._fadvise(
+                f.fileno(), self._log_dropped, pos - self._log_dropped,
+                'POSIX_FADV_DONTNEED'
+            )
+            self._log_dropped = pos
+
+    def _fadvise(self, fd: int, offset: int, length: int, advice: str):
+        """
+        posix_fadviseを呼ぶ（未対応の環境では何もしない）
+
+        Args:
+            fd: ファイルディスクリプタ
+            offset: 開始位置
+            length: 長さ（0はファイル末尾まで）
+            advice: osモジュールの定数名
+        """
+        if not hasattr(os, 'posix_fadvise'):
+            return
         try:
-            with open(log_path, 'r') as f:
-                # ファイル末尾に移動
-                f.seek(0, 2)
-
-                self.logger.info(f"Monitoring Samba log: {log_file}")
-
-                while self.running:
-                    line = f.readline()
-                    if line:
-                        # アクセスログが記録されたらアクセス時刻を更新
-                        # Sambaのfull_auditログには共有名が含まれる
-                        if self.share_name in line:
-                            self.logger.debug(f"Access detected: {line.strip()}")
-
-                            # 警告期間中（最初の警告日以降）の場合、キャンセル通知を送信
-                            days = self.tracker.days_since_last_access()
-                            if days is not None and len(self.warning_days) > 0:
-                                first_warning_day = self.warning_days[0]
-                                if days >= first_warning_day and self.notifier:
-                                    try:
-                                        self.notifier.send_deletion_cancelled_notification()
-                                        self.logger.info("Deletion cancelled notification sent")
-                                    except Exception as e:
-                                        self.logger.error(f"Failed to send cancellation notification: {e}")
-
-                            # アクセス時刻を更新
-                            self.tracker.update_access()
-
-                            # 通知状態をリセット
-                            if self.notifier:
-                                self.notifier.reset_notification_state()
-                    else:
-                        # 新しい行がない場合は少し待つ
-                        time.sleep(1)
+            os.posix_fadvise(fd, offset, length, getattr(os, advice))
+        except OSError as e:
+            self.logger.debug(f"posix_fadvise({advice}) failed: {e}")
+
+    def _on_samba_log_event(self):
+        """inotifyイベントを受け取り、Sambaログの読み込みを予約する"""
+        self._log_event_mask |= self._inotify.read_events()
+
+        # 書き込みが続く場合に備えて、待機のタイムアウトで少し後にまとめて読み込む
+        # （ハンドラ内で眠るとシグナルなど他のイベントも待たされる）
+        if self._log_drain_at is None:
+            self._log_drain_at = time.monotonic() + self.LOG_COALESCE_DELAY
+
+    def _drain_samba_log_events(self):
+        """予約されたSambaログの読み込みを行う"""
+        mask = self._log_event_mask
+        self._log_event_mask = 0
+        self._log_drain_at = None
+        if self._log_file is None:
+            return
 
-        except Exception as e:
-            self.logger.error(f"Error monitoring Samba log: {e}")
+        self._drain_samba_log()
+
+        if mask & (IN_MOVE_SELF | IN_DELETE_SELF):
+            # 残りの行を処理してから開き直す
+            self._close_samba_log()
+            self.logger.info(f"Samba log rotated, reopening: {self._log_path}")
+            if self._open_samba_log(seek_end=False):
+                self._drain_samba_log()
+
+    def _poll_samba_log(self):
+        """タイムアウト時のログ処理（ポーリング・再オープン・保留中アクセスの書き込み）"""
+        if self._log_drain_at is not None and time.monotonic() >= self._log_drain_at:
+            self._drain_samba_log_events()
+
+        if self._log_path is not None:
+            if self._log_file is None:
+                # ローテーション後に新しいファイルが作成されたか確認
+                if self._open_samba_log(seek_end=False):
+                    self._drain_samba_log()
+            elif self._inotify is None:
+                # inotifyが使えない場合はポーリングで追跡
+                self._drain_samba_log()
+
+        if (self._pending_access is not None and
+                time.monotonic() - self._last_flush_monotonic >= self.ACCESS_FLUSH_INTERVAL):
+            self._flush_pending_access()
+
+    def _next_check_delay(self) -> float:
+        """
+        次回チェックまでの待ち時間を計算
+
+        次の警告日または削除日に到達する時刻と、定期チェック間隔の早い方を返す。
+
+        Returns:
+            待ち時間（秒）
+        """
+        delay = self.CHECK_INTERVAL
+
+        snap = self.tracker.snapshot()
+        if snap.days is not None:
+            idx = bisect.bisect_right(self._schedule_days, snap.days)
+            if idx < len(self._schedule_days):
+                target = snap.last_access + timedelta(days=self._schedule_days[idx])
+                delay = min(delay, max(0.0, (target - snap.now).total_seconds()))
+
+        return delay
+
+    def _next_timeout(self, next_check: float) -> float:
+        """
+        イベント待機のタイムアウトを計算
+
+        Args:
+            next_check: 次回定期チェックの時刻（time.monotonic基準）
+
+        Returns:
+            タイムアウト（秒）
+        """
+        now = time.monotonic()
+        timeout = next_check - now
+
+        # inotify通知後の読み込みを予約している場合
+        if self._log_drain_at is not None:
+            timeout = min(timeout, self._log_drain_at - now)
+
+        # 保留中のアクセスは書き込み間隔が経過したら書き込む
+        if self._pending_access is not None:
+            timeout = min(timeout, self._last_flush_monotonic + self.ACCESS_FLUSH_INTERVAL - now)
+
+        # ポーリング時・ローテーション待ちの間は1秒ごとに確認
+        if self._log_path is not None and (self._log_file is None or self._inotify is None):
+            timeout = min(timeout, self.LOG_POLL_INTERVAL)
+
+        return max(0.0, timeout)
 
     def check_and_notify(self):
         """
@@ -158,14 +607,35 @@ class NASMonitor:
         Returns:
             消去が必要な場合True
         """
-        days = self.tracker.days_since_last_access()
+        snap = self.tracker.snapshot()
+        self._last_snapshot = snap
 
-        if days is None:
+        if snap.days is None:
             self.logger.info("No access history found, initializing...")
-            self.tracker.update_access()
+            self.tracker.update_access(snap.now)
+            return False
+
+        days = snap.days
+
+        self.logger.info("Days since last access: %d/%d", days, self.inactivity_days)
+
+        # 通常時（警告日前）は何もしない
+        if days < self._first_action_day:
             return False
 
-        self.logger.info(f"Days since last access: {days}/{self.inactivity_days}")
+        return self._check_thresholds(snap)
+
+    def _check_thresholds(self, snap: AccessSnapshot) -> bool:
+        """
+        警告日・削除日に到達した場合の処理
+
+        Args:
+            snap: チェック時のアクセス状態
+
+        Returns:
+            消去が必要な場合True
+        """
+        days = snap.days
 
         # 削除閾値に達したか
         if days >= self.inactivity_days:
@@ -175,18 +645,34 @@ class NASMonitor:
             return True
 
         # 警告通知を送信
-        if self.notifier:
-            deletion_date = self.tracker.get_deletion_date(self.inactivity_days)
-
-            for warning_day in self.warning_days:
-                if days >= warning_day and days < self.inactivity_days:
-                    try:
-                        success = self.notifier.send_warning(
-                            warning_day=warning_day,
-                            days_elapsed=days,
-                            inactivity_days=self.inactivity_days,
-                            deletion_date=deletion_date
-                        )
+        # 経過日数が含まれる警告期間（警告日〜次の警告日）を二分探索で特定
+        idx = bisect.bisect_right(self.warning_days, days) - 1
+        if self.notifier and idx >= 0:
+            warning_day = self.warning_days[idx]
+            notification_state = self.notifier.get_notification_state()
+
+            # 次の警告日（最後の警告の場合は削除日）
+            if idx + 1 < len(self.warning_days):
+                next_warning_day = self.warning_days[idx + 1]
+            else:
+                next_warning_day = self.inactivity_days
+
+            # 送信が必要な警告を集め、1回のSMTPセッション・1回の状態保存でまとめて送る
+            pending = []
+            if self.tracker.should_send_warning(
+                days, warning_day, next_warning_day, notification_state
+            ):
+                pending.append({
+                    'warning_day': warning_day,
+                    'days_elapsed': days,
+                    'inactivity_days': self.inactivity_days,
+                    'deletion_date': snap.deletion_date(self.inactivity_days),
+                })
+
+            if pending:
+                try:
+                    results = self.notifier.send_warnings_batch(pending)
+                    for warning_day, success in results.items():
                         if success:
                             self.logger.info(
                                 f"Warning notification sent for day {warning_day}"
@@ -195,27 +681,34 @@ class NASMonitor:
                             self.logger.error(
                                 f"Failed to send warning notification for day {warning_day}"
                             )
-                    except Exception as e:
-                        self.logger.error(f"Error sending notification: {e}")
+                except Exception as e:
+                    self.logger.error(f"Error sending notification: {e}")
 
         return False
 
-    def execute_wipe(self):
-        """セキュア消去を実行"""
+    def execute_wipe(self, snap: Optional[AccessSnapshot] = None):
+        """
+        セキュア消去を実行
+
+        Args:
+            snap: 直前のチェックで取得したアクセス状態（Noneの場合は読み込む）
+        """
         self.logger.critical("=" * 70)
         self.logger.critical("EXECUTING SECURE WIPE")
         self.logger.critical("=" * 70)
 
         try:
             # 最終確認ログ
-            last_access = self.tracker.get_last_access()
+            if snap is None:
+                snap = self.tracker.snapshot()
+            last_access = snap.last_access
+            days_elapsed = snap.days
             self.logger.critical(f"Last access: {last_access}")
-            self.logger.critical(f"Days since last access: {self.tracker.days_since_last_access()}")
+            self.logger.critical(f"Days since last access: {days_elapsed}")
 
             # 削除完了通知を送信（削除実行前に送信、再起動前に確実に送る）
             if self.notifier:
                 try:
-                    days_elapsed = self.tracker.days_since_last_access()
                     self.logger.info("Sending wipe completion notification...")
                     self.notifier.send_wipe_complete_notification(
                         days_elapsed=days_elapsed,
@@ -226,7 +719,7 @@ class NASMonitor:
                     self.logger.error(f"Failed to send wipe complete notification: {e}")
 
             # 消去実行
-            # キーファイルを shred で完全削除することで、LUKS 暗号化データを復元不可能にする
+            # キーファイルを上書き削除することで、LUKS 暗号化データを復元不可能にする
             self.wiper.execute_secure_wipe(
                 reboot_after=self.reboot_after_wipe
             )
@@ -246,8 +739,9 @@ class NASMonitor:
         """削除後に監視サービスを無効化"""
         try:
             self.logger.info("Disabling nas-monitor service to prevent restart...")
+            # 無効化は次回起動時に効けばよいため、daemon-reloadは省略する
             subprocess.run(
-                ['systemctl', 'disable', 'nas-monitor.service'],
+                ['systemctl', 'disable', '--no-reload', 'nas-monitor.service'],
                 check=True,
                 capture_output=True
             )
@@ -263,10 +757,15 @@ class NASMonitor:
         if self.already_wiped:
             return
 
+        self._lower_priority()
+        # 消去処理で使うライブラリを読み込んでからロックする（MCL_ONFAULTは触れたページのみ）
+        self.wiper.prefault()
+        self._lock_memory()
+
         self.logger.info("=" * 70)
         self.logger.info("NAS Monitor starting...")
         self.logger.info(f"Inactivity threshold: {self.inactivity_days} days")
-        self.logger.info(f"Warning days: {self.warning_days}")
+        self.logger.info(f"Warning days: {list(self.warning_days)}")
         self.logger.info(f"Notification enabled: {self.notifier is not None}")
         self.logger.info("=" * 70)
 
@@ -274,34 +773,64 @@ class NASMonitor:
         self.logger.info("Performing startup check...")
         if self.check_and_notify():
             self.logger.critical("Inactivity threshold already exceeded at startup")
-            self.execute_wipe()
+            self.execute_wipe(self._last_snapshot)
             return
 
-        # 定期チェック（1時間ごと）
-        check_interval = 1 * 60 * 60  # 1時間
-        last_check = time.time()
+        # 定期チェック（1時間ごと、警告日・削除日の到達時刻にも実行）
+        next_check = time.monotonic() + self._next_check_delay()
 
-        # Sambaログ監視を別スレッドで実行
-        import threading
-        log_thread = threading.Thread(target=self.monitor_samba_log, daemon=True)
-        log_thread.start()
-        self.logger.info("Samba log monitoring thread started")
+        # シグナル・Sambaログ・タイマーを1つのイベントループで待つ
+        # シグナル受信時はwakeup fdに書き込まれ、待機が即座に解除される
+        selector = selectors.DefaultSelector()
+        wakeup_r, wakeup_w = os.pipe()
+        os.set_blocking(wakeup_r, False)
+        os.set_blocking(wakeup_w, False)
+        old_wakeup_fd = signal.set_wakeup_fd(wakeup_w)
+        selector.register(wakeup_r, selectors.EVENT_READ)
+        if self._inotify is not None:
+            selector.register(self._inotify.fileno(), selectors.EVENT_READ)
 
-        self.logger.info("Entering main monitoring loop...")
-
-        while self.running:
-            current_time = time.time()
+        try:
+            self._start_log_monitor()
+
+            self.logger.info("Entering main monitoring loop...")
+
+            while self.running:
+                for key, _ in selector.select(self._next_timeout(next_check)):
+                    if key.fd == wakeup_r:
+                        # シグナルハンドラで実行フラグは更新済み、通知を読み捨てる
+                        try:
+                            while os.read(wakeup_r, 64):
+                                pass
+                        except BlockingIOError:
+                            pass
+                    else:
+                        self._on_samba_log_event()
 
-            # 定期チェック
-            if current_time - last_check >= check_interval:
-                self.logger.info("Performing periodic check...")
-                if self.check_and_notify():
-                    self.execute_wipe()
+                if not self.running:
                     break
-                last_check = current_time
 
-            # 1分ごとにループチェック（CPU節約）
-            time.sleep(60)
+                self._poll_samba_log()
+
+                # 定期チェック
+                if time.monotonic() >= next_check:
+                    self.logger.info("Performing periodic check...")
+                    if self.check_and_notify():
+                        self.execute_wipe(self._last_snapshot)
+                        break
+                    next_check = time.monotonic() + self._next_check_delay()
+        finally:
+            signal.set_wakeup_fd(old_wakeup_fd)
+            selector.close()
+            os.close(wakeup_r)
+            os.close(wakeup_w)
+
+            # 保留中のアクセス時刻を書き込んでから終了
+            self._close_samba_log()
+            self._flush_pending_access()
+
+            if self.notifier:
+                self.notifier.close()
 
         self.logger.info("NAS Monitor stopped")
 
@@ -344,6 +873,8 @@ def main():
     except Exception as e:
         logger.critical(f"Fatal error: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        stop_logging()
 
 
 if __name__ == '__main__':
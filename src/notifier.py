@@ -5,15 +5,138 @@
 メールで段階的な警告通知を送信する。
 """
 
+import importlib
 import json
 import logging
-import smtplib
+import os
 import socket
 from datetime import datetime
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from pathlib import Path
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+# smtplib・emailパッケージ（ssl等も読み込まれる）は通知が有効な場合のみ
+# EmailNotifierの初期化時に読み込む（通知無効時はメモリに載せない）
+if TYPE_CHECKING:
+    import smtplib
+
+# メール送信で使うモジュール（EmailNotifierの初期化時に読み込む）
+_MAIL_MODULES = ('base64', 'email.header', 'email.utils', 'smtplib')
+
+# 通知状態のシリアライザ（json.dumpsに引数を渡すと毎回エンコーダが生成されるため使い回す）
+_STATE_ENCODER = json.JSONEncoder(separators=(',', ':'))
+
+# メール本文で使う日時フォーマット
+_DATETIME_FORMAT = '%Y年%m月%d日 %H:%M:%S'
+
+# 警告メール本文テンプレート（固定部分はモジュール読み込み時に一度だけ生成）
+_WARNING_TEMPLATE = """こんにちは、
+
+Secret NAS システムから自動通知です。
+
+{urgency}: データ削除が近づいています
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+  警告レベル: {warning_level}
+  最終アクセス: {days_elapsed}日前
+  残り期間: あと{days_remaining}日
+  削除予定日時: {deletion_date}
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+あと{days_remaining}日間アクセスがない場合、すべてのデータが自動的に
+完全削除されます。暗号化キーが削除されるため、復元は不可能です。
+
+【データを保持したい場合】
+今すぐNASにアクセスしてください。アクセスするとタイマーが
+リセットされ、再び30日間の猶予が与えられます。
+
+【アクセス方法】
+  ホスト: {hostname}.local (または {hostname})
+  共有名: {share_name}
+
+  Windows: \\\\{hostname}.local\\{share_name}
+  Mac: Finder > 移動 > サーバへ接続 > smb://{hostname}.local/{share_name}
+  Linux: smb://{hostname}.local/{share_name}
+
+【重要】
+データを削除したい場合は、何もする必要はありません。
+予定日時になると自動的に削除されます。
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+このメールはSecret NASシステムから自動送信されています。
+返信しないでください。
+
+Secret NAS - Raspberry Pi
+"""
+
+# 削除完了通知メール本文テンプレート
+_WIPE_COMPLETE_TEMPLATE = """こんにちは、
+
+Secret NASシステムから自動通知です。
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+  データ削除が完了しました
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+非アクティブ期間が削除閾値に達したため、すべてのデータが
+安全に削除されました。
+
+【削除情報】
+  ホスト名: {hostname}
+  最終アクセス: {last_access}
+  経過日数: {days_elapsed}日
+  削除実行日時: {wiped_at}
+
+【削除方法】
+  LUKS暗号化キーファイルを完全削除しました。
+  暗号化されたデータは残っていますが、キーがないため
+  永久に復号できません。データ復旧は不可能です。
+
+【次のステップ】
+  NASを再度使用したい場合は、以下の手順でセットアップしてください：
+  1. Raspberry Piにログイン
+  2. setup.shスクリプトを再実行
+  3. 新しい暗号化キーで初期化
+
+このメールはSecret NASシステムから自動送信されています。
+返信しないでください。
+
+Secret NAS - Raspberry Pi
+"""
+
+# 削除キャンセル通知メール本文テンプレート
+_CANCELLED_TEMPLATE = """こんにちは、
+
+Secret NASシステムから自動通知です。
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+  データ削除がキャンセルされました
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+NASへのアクセスを検出したため、削除予定をキャンセルしました。
+以前送信した警告は無効となり、タイマーがリセットされました。
+
+【現在の状態】
+  ホスト名: {hostname}
+  アクセス検出日時: {detected_at}
+  タイマー: リセット完了
+
+【次回の削除予定】
+  本日から再び非アクティブ期間のカウントが開始されます。
+  設定された期間（デフォルト30日）アクセスがない場合、
+  再度警告メールが送信され、最終的にデータが削除されます。
+
+【NASアクセス情報】
+  Windows: \\\\{hostname}\\{share_name}
+  Mac/Linux: smb://{hostname}.local/{share_name}
+
+データは安全に保持されています。引き続きご利用ください。
+
+このメールはSecret NASシステムから自動送信されています。
+返信しないでください。
+
+Secret NAS - Raspberry Pi
+"""
 
 
 class EmailNotifier:
@@ -45,6 +168,29 @@ class EmailNotifier:
         # 状態ファイルのディレクトリを作成
         self.state_file.parent.mkdir(parents=True, exist_ok=True)
 
+        # 送信間で使い回すSMTPセッション
+        self._smtp: Optional['smtplib.SMTP'] = None
+
+        # メール送信用のモジュールを先に読み込み、監視開始時のmlockallで常駐させる
+        # （警告メールの送信時にSDカードからページインを待たない）
+        for module in _MAIL_MODULES:
+            importlib.import_module(module)
+
+        # ホスト名は稼働中に変わらないため一度だけ取得し、
+        # ホスト名・共有名だけに依存する部分はテンプレートに埋め込んでおく
+        self._hostname = self._get_hostname()
+        fixed = {'hostname': self._hostname, 'share_name': self.share_name}
+        self._warning_template = self._bind_template(_WARNING_TEMPLATE, fixed)
+        self._wipe_complete_template = self._bind_template(_WIPE_COMPLETE_TEMPLATE, fixed)
+        self._cancelled_template = self._bind_template(_CANCELLED_TEMPLATE, fixed)
+
+        # 通知状態のキャッシュ（状態ファイルのmtimeで無効化）
+        self._state_cache: Optional[Dict] = None
+        self._state_mtime_ns = -1
+
+        # 最後に書き込んだ状態のシリアライズ結果（変更がない保存を省く）
+        self._serialized_state: Optional[bytes] = None
+
     def _load_notification_state(self) -> Dict:
         """
         通知状態を読み込む
@@ -52,16 +198,78 @@ class EmailNotifier:
         Returns:
             通知状態辞書
         """
-        if not self.state_file.exists():
+        try:
+            mtime_ns = self.state_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._state_cache = None
             return {}
 
+        # 変更されていなければキャッシュを返す（呼び出し側での変更に備えてコピー）
+        if self._state_cache is not None and mtime_ns == self._state_mtime_ns:
+            return dict(self._state_cache)
+
+        # 読み込みのたびにatimeが更新されないようO_NOATIMEで開く
+        # （O_NOATIMEはファイル所有者かCAP_FOWNERが必要）
+        flags = os.O_RDONLY | os.O_CLOEXEC
         try:
-            with open(self.state_file, 'r') as f:
-                return json.load(f)
+            try:
+                fd = os.open(str(self.state_file), flags | getattr(os, 'O_NOATIME', 0))
+            except PermissionError:
+                fd = os.open(str(self.state_file), flags)
+            with os.fdopen(fd, 'rb') as f:
+                mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+                state = self._migrate_state(json.loads(f.read()))
         except (json.JSONDecodeError, IOError) as e:
             self.logger.error(f"Failed to load notification state: {e}")
             return {}
 
+        self._state_cache = state
+        self._state_mtime_ns = mtime_ns
+        self._serialized_state = None
+        return dict(state)
+
+    @staticmethod
+    def _migrate_state(state: Dict) -> Dict:
+        """
+        旧形式の通知状態を変換
+
+        旧形式は警告日ごとに {"warning_23": {"sent": true, ...}} を持つ。
+        新形式は送信済みの警告日をビットマスク（ビット位置=警告日）で持ち、
+        送信時の詳細は details にまとめる。
+
+        Args:
+            state: 読み込んだ通知状態辞書
+
+        Returns:
+            新形式の通知状態辞書
+        """
+        if 'sent_mask' in state:
+            return state
+
+        sent_mask = 0
+        details = {}
+        for key, value in state.items():
+            if not key.startswith('warning_') or not isinstance(value, dict):
+                continue
+            try:
+                warning_day = int(key[len('warning_'):])
+            except ValueError:
+                continue
+            details[key] = value
+            if value.get('sent', False):
+                sent_mask |= 1 << warning_day
+
+        return {'sent_mask': sent_mask, 'details': details}
+
+    def get_notification_state(self) -> Dict:
+        """
+        現在の通知状態を取得
+
+        Returns:
+            通知状態辞書
+        """
+        return self._load_notification_state()
+
     def _save_notification_state(self, state: Dict):
         """
         通知状態を保存
@@ -69,17 +277,51 @@ class EmailNotifier:
         Args:
             state: 通知状態辞書
         """
+        blob = _STATE_ENCODER.encode(state).encode('utf-8')
+
+        # 前回書き込んだ内容と同じなら書き込まない
+        if blob == self._serialized_state and self.state_file.exists():
+            return
+
         try:
-            # アトミック書き込み
+            # アトミック書き込み（書き込み→fsync→rename）
             temp_file = self.state_file.with_suffix('.tmp')
-            with open(temp_file, 'w') as f:
-                json.dump(state, f, indent=2)
-            temp_file.replace(self.state_file)
+            with open(temp_file, 'wb') as f:
+                f.write(blob)
+                f.flush()
+                os.fsync(f.fileno())
+                # renameではmtimeは変わらないため、ここで取得しておく
+                mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            os.replace(temp_file, self.state_file)
+
+            self._state_cache = dict(state)
+            self._state_mtime_ns = mtime_ns
+            self._serialized_state = blob
 
             self.logger.debug(f"Saved notification state: {state}")
         except Exception as e:
+            self._state_cache = None
+            self._serialized_state = None
             self.logger.error(f"Failed to save notification state: {e}")
 
+    @staticmethod
+    def _bind_template(template: str, values: Dict[str, str]) -> str:
+        """
+        テンプレートの一部のフィールドだけを埋め込む
+
+        Args:
+            template: str.format_map形式のテンプレート
+            values: 埋め込むフィールド名と値
+
+        Returns:
+            残りのフィールドを持つテンプレート
+        """
+        for name, value in values.items():
+            # 値に含まれる波括弧が後のformat_mapで解釈されないようエスケープ
+            escaped = str(value).replace('{', '{{').replace('}', '}}')
+            template = template.replace('{' + name + '}', escaped)
+        return template
+
     def _get_hostname(self) -> str:
         """ホスト名を取得"""
         try:
@@ -104,8 +346,6 @@ class EmailNotifier:
         Returns:
             メール本文（テキスト）
         """
-        hostname = self._get_hostname()
-
         if days_remaining <= 1:
             urgency = "最終警告"
             warning_level = "CRITICAL"
@@ -116,46 +356,13 @@ class EmailNotifier:
             urgency = "警告"
             warning_level = "WARNING"
 
-        message = f"""こんにちは、
-
-Secret NAS システムから自動通知です。
-
-{urgency}: データ削除が近づいています
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-  警告レベル: {warning_level}
-  最終アクセス: {days_elapsed}日前
-  残り期間: あと{days_remaining}日
-  削除予定日時: {deletion_date.strftime('%Y年%m月%d日 %H:%M:%S')}
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-あと{days_remaining}日間アクセスがない場合、すべてのデータが自動的に
-完全削除されます。暗号化キーが削除されるため、復元は不可能です。
-
-【データを保持したい場合】
-今すぐNASにアクセスしてください。アクセスするとタイマーが
-リセットされ、再び30日間の猶予が与えられます。
-
-【アクセス方法】
-  ホスト: {hostname}.local (または {hostname})
-  共有名: {self.share_name}
-
-  Windows: \\\\{hostname}.local\\{self.share_name}
-  Mac: Finder > 移動 > サーバへ接続 > smb://{hostname}.local/{self.share_name}
-  Linux: smb://{hostname}.local/{self.share_name}
-
-【重要】
-データを削除したい場合は、何もする必要はありません。
-予定日時になると自動的に削除されます。
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-このメールはSecret NASシステムから自動送信されています。
-返信しないでください。
-
-Secret NAS - Raspberry Pi
-"""
-        return message
+        return self._warning_template.format_map({
+            'urgency': urgency,
+            'warning_level': warning_level,
+            'days_elapsed': days_elapsed,
+            'days_remaining': days_remaining,
+            'deletion_date': deletion_date.strftime(_DATETIME_FORMAT),
+        })
 
     def _create_subject(self, days_remaining: int) -> str:
         """
@@ -193,34 +400,74 @@ Secret NAS - Raspberry Pi
         Returns:
             送信成功した場合True
         """
-        # 既に送信済みかチェック
-        state = self._load_notification_state()
-        warning_key = f"warning_{warning_day}"
-
-        if state.get(warning_key, {}).get('sent', False):
-            self.logger.info(f"Warning for day {warning_day} already sent, skipping")
-            return True
+        results = self.send_warnings_batch([{
+            'warning_day': warning_day,
+            'days_elapsed': days_elapsed,
+            'inactivity_days': inactivity_days,
+            'deletion_date': deletion_date,
+        }])
+        return results[warning_day]
+
+    def send_warnings_batch(self, pending: List[Dict]) -> Dict[int, bool]:
+        """
+        複数の警告メールをまとめて送信
 
-        days_remaining = inactivity_days - days_elapsed
+        同じSMTPセッションで順に送信し、通知状態の保存は最後に一度だけ行う。
 
-        # メッセージ作成
-        subject = self._create_subject(days_remaining)
-        body = self._create_warning_message(days_elapsed, days_remaining, deletion_date)
+        Args:
+            pending: 警告情報のリスト
+                （各要素は warning_day, days_elapsed, inactivity_days, deletion_date を持つ辞書）
 
-        # メール送信
-        success = self._send_email(subject, body)
+        Returns:
+            警告日ごとの送信結果（送信成功または送信済みの場合True）
+        """
+        state = self._load_notification_state()
+        sent_mask = state.get('sent_mask', 0)
+        # キャッシュと共有しないようコピーしてから更新する
+        details = dict(state.get('details', {}))
+        results: Dict[int, bool] = {}
+        updated = False
+
+        for p in pending:
+            warning_day = p['warning_day']
+            days_elapsed = p['days_elapsed']
+            warning_key = f"warning_{warning_day}"
+
+            # 既に送信済みかチェック
+            if sent_mask & (1 << warning_day):
+                self.logger.info(f"Warning for day {warning_day} already sent, skipping")
+                results[warning_day] = True
+                continue
+
+            days_remaining = p['inactivity_days'] - days_elapsed
+
+            # メッセージ作成
+            subject = self._create_subject(days_remaining)
+            body = self._create_warning_message(
+                days_elapsed, days_remaining, p['deletion_date']
+            )
 
-        # 送信状態を記録
-        if success:
-            state[warning_key] = {
-                'sent': True,
-                'sent_at': datetime.now().isoformat(),
-                'days_elapsed': days_elapsed,
-                'days_remaining': days_remaining
-            }
+            # メール送信
+            success = self._send_email(subject, body)
+            results[warning_day] = success
+
+            # 送信状態を記録
+            if success:
+                sent_mask |= 1 << warning_day
+                details[warning_key] = {
+                    'sent': True,
+                    'sent_at': datetime.now().isoformat(),
+                    'days_elapsed': days_elapsed,
+                    'days_remaining': days_remaining
+                }
+                updated = True
+
+        if updated:
+            state['sent_mask'] = sent_mask
+            state['details'] = details
             self._save_notification_state(state)
 
-        return success
+        return results
 
     def send_wipe_complete_notification(self, days_elapsed: int, last_access: datetime) -> bool:
         """
@@ -233,43 +480,13 @@ Secret NAS - Raspberry Pi
         Returns:
             送信成功した場合True
         """
-        hostname = self._get_hostname()
-
         subject = "[完了] Secret NAS データが削除されました"
 
-        body = f"""こんにちは、
-
-Secret NASシステムから自動通知です。
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-  データ削除が完了しました
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-非アクティブ期間が削除閾値に達したため、すべてのデータが
-安全に削除されました。
-
-【削除情報】
-  ホスト名: {hostname}
-  最終アクセス: {last_access.strftime('%Y年%m月%d日 %H:%M:%S')}
-  経過日数: {days_elapsed}日
-  削除実行日時: {datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}
-
-【削除方法】
-  LUKS暗号化キーファイルを完全削除しました。
-  暗号化されたデータは残っていますが、キーがないため
-  永久に復号できません。データ復旧は不可能です。
-
-【次のステップ】
-  NASを再度使用したい場合は、以下の手順でセットアップしてください：
-  1. Raspberry Piにログイン
-  2. setup.shスクリプトを再実行
-  3. 新しい暗号化キーで初期化
-
-このメールはSecret NASシステムから自動送信されています。
-返信しないでください。
-
-Secret NAS - Raspberry Pi
-"""
+        body = self._wipe_complete_template.format_map({
+            'last_access': last_access.strftime(_DATETIME_FORMAT),
+            'days_elapsed': days_elapsed,
+            'wiped_at': datetime.now().strftime(_DATETIME_FORMAT),
+        })
 
         # メール送信
         success = self._send_email(subject, body)
@@ -289,42 +506,11 @@ Secret NAS - Raspberry Pi
         Returns:
             送信成功した場合True
         """
-        hostname = self._get_hostname()
-
         subject = "[解除] Secret NAS データ削除がキャンセルされました"
 
-        body = f"""こんにちは、
-
-Secret NASシステムから自動通知です。
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-  データ削除がキャンセルされました
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-NASへのアクセスを検出したため、削除予定をキャンセルしました。
-以前送信した警告は無効となり、タイマーがリセットされました。
-
-【現在の状態】
-  ホスト名: {hostname}
-  アクセス検出日時: {datetime.now().strftime('%Y年%m月%d日 %H:%M:%S')}
-  タイマー: リセット完了
-
-【次回の削除予定】
-  本日から再び非アクティブ期間のカウントが開始されます。
-  設定された期間（デフォルト30日）アクセスがない場合、
-  再度警告メールが送信され、最終的にデータが削除されます。
-
-【NASアクセス情報】
-  Windows: \\\\{hostname}\\{self.share_name}
-  Mac/Linux: smb://{hostname}.local/{self.share_name}
-
-データは安全に保持されています。引き続きご利用ください。
-
-このメールはSecret NASシステムから自動送信されています。
-返信しないでください。
-
-Secret NAS - Raspberry Pi
-"""
+        body = self._cancelled_template.format_map({
+            'detected_at': datetime.now().strftime(_DATETIME_FORMAT),
+        })
 
         # メール送信
         success = self._send_email(subject, body)
@@ -347,62 +533,147 @@ Secret NAS - Raspberry Pi
         Returns:
             送信成功した場合True
         """
+        import smtplib
+        from email.utils import getaddresses
+
         to_addr = self.email_config.get('to')
         from_addr = self.email_config.get('from')
         smtp_server = self.email_config.get('smtp_server')
-        smtp_port = self.email_config.get('smtp_port', 587)
         username = self.email_config.get('username')
         password = self.email_config.get('password')
-        use_tls = self.email_config.get('use_tls', True)
 
         if not all([to_addr, from_addr, smtp_server, username, password]):
             self.logger.error("Email configuration is incomplete")
             return False
 
         try:
-            # MIMEメッセージ作成
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = from_addr
-            msg['To'] = to_addr
-
-            # テキストパート
-            text_part = MIMEText(body, 'plain', 'utf-8')
-            msg.attach(text_part)
-
-            # SMTP接続
-            self.logger.info(f"Connecting to SMTP server: {smtp_server}:{smtp_port}")
-
-            if use_tls:
-                # TLS接続
-                server = smtplib.SMTP(smtp_server, smtp_port, timeout=30)
-                server.starttls()
-            else:
-                # 非TLS接続
-                server = smtplib.SMTP(smtp_server, smtp_port, timeout=30)
-
-            # ログイン
-            server.login(username, password)
-
-            # メール送信
-            server.send_message(msg)
-            server.quit()
+            msg = self._build_mail(subject, body, from_addr, to_addr)
+            # カンマ区切りで複数指定された宛先をすべてエンベロープの宛先にする
+            recipients = [addr for _, addr in getaddresses([to_addr]) if addr]
+
+            # 確立済みのSMTPセッションを再利用して送信
+            # サーバ側で切断されていた場合は一度だけ再接続して再送する
+            try:
+                self._get_smtp().sendmail(from_addr, recipients, msg)
+            except smtplib.SMTPServerDisconnected:
+                self.logger.info("SMTP session was disconnected, reconnecting...")
+                self._drop_smtp()
+                self._get_smtp().sendmail(from_addr, recipients, msg)
 
             self.logger.info(f"Email sent successfully to {to_addr}")
             return True
 
         except smtplib.SMTPAuthenticationError as e:
+            self._drop_smtp()
             self.logger.error(f"SMTP authentication failed: {e}")
             return False
         except smtplib.SMTPException as e:
+            self._drop_smtp()
             self.logger.error(f"SMTP error occurred: {e}")
             return False
         except Exception as e:
+            self._drop_smtp()
             self.logger.error(f"Failed to send email: {e}")
             return False
 
+    def _build_mail(self, subject: str, body: str, from_addr: str, to_addr: str) -> bytes:
+        """
+        テキスト1パートだけのメールを組み立てる
+
+        添付やalternativeパートはないため、emailパッケージのMIMEオブジェクトを
+        使わずにヘッダと本文を直接生成する。
+
+        Args:
+            subject: 件名
+            body: 本文
+            from_addr: 送信元アドレス
+            to_addr: 送信先アドレス
+
+        Returns:
+            SMTPでそのまま送信できるメッセージ（CRLF改行）
+        """
+        import base64
+        from email.header import Header
+        from email.utils import formatdate, make_msgid
+
+        encoded_subject = Header(subject, 'utf-8').encode(linesep='\r\n')
+        headers = (
+            f"Subject: {encoded_subject}\r\n"
+            f"From: {from_addr}\r\n"
+            f"To: {to_addr}\r\n"
+            f"Date: {formatdate(localtime=True)}\r\n"
+            f"Message-ID: {make_msgid(domain=self._hostname)}\r\n"
+            "MIME-Version: 1.0\r\n"
+            "Content-Type: text/plain; charset=\"utf-8\"\r\n"
+            "Content-Transfer-Encoding: base64\r\n"
+            "\r\n"
+        )
+        # 8BITMIME非対応のサーバも考慮し、従来どおりbase64で本文を送る
+        encoded = base64.encodebytes(body.encode('utf-8')).replace(b'\n', b'\r\n')
+        return headers.encode('utf-8') + encoded
+
+    def _get_smtp(self) -> 'smtplib.SMTP':
+        """
+        SMTPセッションを取得
+
+        既存のセッションがNOOPに応答すればそれを再利用し、
+        応答しなければ新しく接続してログインする。
+
+        Returns:
+            ログイン済みのSMTPセッション
+        """
+        import smtplib
+
+        if self._smtp is not None:
+            try:
+                self._smtp.noop()
+                return self._smtp
+            except (smtplib.SMTPException, OSError):
+                self._drop_smtp()
+
+        smtp_server = self.email_config.get('smtp_server')
+        smtp_port = self.email_config.get('smtp_port', 587)
+        use_tls = self.email_config.get('use_tls', True)
+
+        self.logger.info(f"Connecting to SMTP server: {smtp_server}:{smtp_port}")
+
+        server = smtplib.SMTP(smtp_server, smtp_port, timeout=30)
+        try:
+            if use_tls:
+                server.starttls()
+            server.login(
+                self.email_config.get('username'),
+                self.email_config.get('password')
+            )
+        except Exception:
+            server.close()
+            raise
+
+        self._smtp = server
+        return server
+
+    def _drop_smtp(self):
+        """SMTPセッションを破棄（QUITは送らない）"""
+        if self._smtp is not None:
+            try:
+                self._smtp.close()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def close(self):
+        """SMTPセッションを終了"""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._drop_smtp()
+
     def reset_notification_state(self):
         """通知状態をリセット（アクセスがあった時）"""
+        self._state_cache = None
+        self._serialized_state = None
         if self.state_file.exists():
             self.state_file.unlink()
             self.logger.info("Notification state reset")
@@ -414,6 +685,8 @@ Secret NAS - Raspberry Pi
         Returns:
             接続成功した場合True
         """
+        import smtplib
+
         smtp_server = self.email_config.get('smtp_server')
         smtp_port = self.email_config.get('smtp_port', 587)
         username = self.email_config.get('username')
@@ -6,12 +6,341 @@ LUKS暗号化キーファイルを削除することで、
 データを復号不可能にする高速かつ確実な消去を実現する。
 """
 
+import ctypes
+import ctypes.util
+import functools
 import logging
 import os
+import re
+import select
+import shutil
 import subprocess
+import threading
 import time
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# デバイス名末尾のパーティション番号
+# /dev/mmcblk0p2 -> /dev/mmcblk0
+# /dev/sda1 -> /dev/sda
+_PARTITION_SUFFIX_RE = re.compile(r'p?\d+$')
+
+
+@functools.lru_cache(maxsize=None)
+def _which(name: str) -> str:
+    """
+    コマンドの絶対パスを取得（見つからない場合はそのまま返す）
+
+    Args:
+        name: コマンド名
+
+    Returns:
+        実行ファイルのパス
+    """
+    return shutil.which(name) or name
+
+
+def _spawn_options(argv) -> dict:
+    """
+    subprocessがposix_spawnで子プロセスを起動できるオプションを返す
+
+    subprocessは実行ファイルが絶対パスでclose_fds=Falseの場合にfork()を使わず
+    posix_spawn()で起動するため、常駐プロセスのページテーブルを複製せずに済む。
+    Pythonが開くファイルディスクリプタは既定で継承されないため、
+    close_fds=Falseでも子プロセスに漏れることはない。
+    標準入力は/dev/nullにつなぎ、確認プロンプトなどで入力待ちにならないようにする。
+
+    Args:
+        argv: コマンドライン
+
+    Returns:
+        subprocess.run / Popen に渡すキーワード引数
+    """
+    return {
+        'executable': _which(argv[0]),
+        'close_fds': False,
+        'stdin': subprocess.DEVNULL,
+    }
+
+
+def _run(argv, **kwargs) -> subprocess.CompletedProcess:
+    """
+    subprocess.run をposix_spawnで実行
+
+    Args:
+        argv: コマンドライン
+        **kwargs: subprocess.run の引数
+
+    Returns:
+        CompletedProcess
+    """
+    return subprocess.run(argv, **_spawn_options(argv), **kwargs)
+
+
+def _is_rotational(st_dev: int) -> Optional[bool]:
+    """
+    デバイス番号のブロックデバイスが回転型ディスクか判定
+
+    パーティションの場合は親ディスクの queue/rotational を参照する。
+
+    Args:
+        st_dev: os.stat() の st_dev
+
+    Returns:
+        HDDならTrue、SSD・SDカードなどのフラッシュならFalse、判定できない場合None
+    """
+    sys_dev = os.path.realpath(f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}")
+    for base in (sys_dev, os.path.dirname(sys_dev)):
+        try:
+            with open(os.path.join(base, 'queue', 'rotational')) as f:
+                return f.read().strip() == '1'
+        except OSError:
+            continue
+    return None
+
+
+# mountinfoで8進数エスケープされる文字（空白・タブ・改行・バックスラッシュ）
+_MOUNTINFO_ESCAPE_RE = re.compile(r'\\([0-7]{3})')
+
+
+def _unescape_mountinfo(field: str) -> str:
+    """mountinfoの8進数エスケープを元に戻す"""
+    return _MOUNTINFO_ESCAPE_RE.sub(lambda m: chr(int(m.group(1), 8)), field)
+
+
+def _escape_mountinfo(path: str) -> bytes:
+    """パスをmountinfoと同じ形式にエスケープする"""
+    escaped = os.fsencode(path)
+    for c in b'\\ \t\n':
+        escaped = escaped.replace(bytes((c,)), b'\\%03o' % c)
+    return escaped
+
+
+def _mount_point_listed(f, target: bytes) -> bool:
+    """
+    開いている /proc/self/mountinfo を先頭から読み直し、マウントポイントがあるか確認
+
+    Args:
+        f: バイナリモードで開いたmountinfo（ポーリング中は開いたまま使い回す）
+        target: _escape_mountinfo() でエスケープしたマウントポイント
+
+    Returns:
+        マウントされている場合True
+    """
+    f.seek(0)
+    data = f.read()
+    # 行ごとにbytesを作らず、全体をbytes.findで検索してから位置を確認する
+    needle = b' ' + target + b' '
+    pos = data.find(needle)
+    while pos != -1:
+        # マウントポイントは5番目のフィールド（行頭から4つ目の空白の直後）
+        line_start = data.rfind(b'\n', 0, pos) + 1
+        if data.count(b' ', line_start, pos + 1) == 4:
+            return True
+        pos = data.find(needle, pos + 1)
+    return False
+
+
+class MountSnapshot(NamedTuple):
+    """
+    /proc/self/mountinfo を一度だけ読んだ時点のマウント状態
+
+    安全チェックやアンマウント待ちで、dfやmountを起動せずに参照する。
+    """
+
+    by_dev: Dict[Tuple[int, int], str]
+    by_mount_point: Dict[str, str]
+
+    @classmethod
+    def capture(cls) -> 'MountSnapshot':
+        """
+        現在のマウント状態を読み込む
+
+        Returns:
+            MountSnapshot
+        """
+        by_dev = {}
+        by_mount_point = {}
+        # UTF-8でないマウントポイントもos.fsdecode()と同じ文字列にする
+        with open('/proc/self/mountinfo', encoding='utf-8', errors='surrogateescape') as f:
+            for line in f:
+                # <id> <parent> <major:minor> <root> <mount point> ... - <fstype> <source> ...
+                fields, _, tail = line.partition(' - ')
+                parts = fields.split(' ', 5)
+                source = _unescape_mountinfo(tail.split(' ')[1])
+                major, _, minor = parts[2].partition(':')
+                # 同じデバイスが複数箇所にマウントされている場合は最初のものを使う
+                by_dev.setdefault((int(major), int(minor)), source)
+                by_mount_point[_unescape_mountinfo(parts[4])] = source
+        return cls(by_dev, by_mount_point)
+
+    def device_for(self, st_dev: int) -> Optional[str]:
+        """
+        デバイス番号からマウント元デバイスを取得
+
+        Args:
+            st_dev: os.stat() の st_dev
+
+        Returns:
+            マウント元デバイス、見つからない場合None
+        """
+        return self.by_dev.get((os.major(st_dev), os.minor(st_dev)))
+
+    def is_mounted(self, mount_point: str) -> bool:
+        """
+        マウントポイントがマウントされているか確認
+
+        Args:
+            mount_point: マウントポイント
+
+        Returns:
+            マウントされている場合True
+        """
+        return mount_point in self.by_mount_point
+
+
+def _find_root_source() -> str:
+    """
+    ルートファイルシステムのマウント元を取得
+
+    Returns:
+        マウント元デバイス（例: /dev/mmcblk0p2）
+    """
+    source = MountSnapshot.capture().by_mount_point['/']
+    if source == '/dev/root':
+        # 古いカーネルでは/dev/rootと表示されるため、sysfsから実デバイス名を求める
+        st_dev = os.stat('/').st_dev
+        sys_path = os.path.realpath(f'/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}')
+        source = '/dev/' + os.path.basename(sys_path)
+    return source
+
+
+def _wait_until(predicate, timeout: float = 2.0, interval: float = 0.01) -> bool:
+    """
+    条件が満たされるまで短い間隔で待つ
+
+    Args:
+        predicate: 条件を判定する関数
+        timeout: 最大待ち時間（秒）
+        interval: 確認間隔（秒）
+
+    Returns:
+        時間内に条件が満たされた場合True
+    """
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+    return True
+
+
+# umount2(2) のフラグ
+MNT_FORCE = 1
+MNT_DETACH = 2
+
+
+@functools.lru_cache(maxsize=1)
+def _libc() -> ctypes.CDLL:
+    """libcを読み込む（プロセス内で一度だけ実行）"""
+    return ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+
+
+def _umount2(mount_point: str, flags: int = 0):
+    """
+    umountコマンドを起動せず、umount2(2) で直接アンマウントする
+
+    Args:
+        mount_point: マウントポイント
+        flags: MNT_FORCE / MNT_DETACH の組み合わせ
+
+    Raises:
+        OSError: アンマウントに失敗した場合
+    """
+    if _libc().umount2(os.fsencode(mount_point), flags) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno), mount_point)
+
+
+@functools.lru_cache(maxsize=1)
+def _libcryptsetup() -> Optional[ctypes.CDLL]:
+    """
+    libcryptsetupを読み込む（プロセス内で一度だけ実行）
+
+    Returns:
+        ライブラリ、見つからない場合None（cryptsetupコマンドを使う）
+    """
+    try:
+        lib = ctypes.CDLL('libcryptsetup.so.12')
+    except OSError:
+        return None
+    lib.crypt_init_by_name.argtypes = (ctypes.POINTER(ctypes.c_void_p), ctypes.c_char_p)
+    lib.crypt_deactivate.argtypes = (ctypes.c_void_p, ctypes.c_char_p)
+    lib.crypt_free.argtypes = (ctypes.c_void_p,)
+    lib.crypt_free.restype = None
+    return lib
+
+
+def _crypt_deactivate(lib: ctypes.CDLL, name: str):
+    """
+    cryptsetupを起動せず、libcryptsetupでデバイスマッパーを閉じる
+
+    Args:
+        lib: _libcryptsetup() が返したライブラリ
+        name: デバイスマッパー名
+
+    Raises:
+        OSError: クローズに失敗した場合
+    """
+    encoded = os.fsencode(name)
+    cd = ctypes.c_void_p()
+    rc = lib.crypt_init_by_name(ctypes.byref(cd), encoded)
+    if rc >= 0:
+        try:
+            rc = lib.crypt_deactivate(cd, encoded)
+        finally:
+            lib.crypt_free(cd)
+    if rc < 0:
+        # libcryptsetupは負のerrnoを返す
+        raise OSError(-rc, os.strerror(-rc), name)
+
+
+# madvise(2) でページテーブルまで読み込む指定（Linux 5.14以降）
+MADV_POPULATE_READ = 22
+
+
+def _populate_library_pages() -> int:
+    """
+    読み込み済みの共有ライブラリのページをすべてページインする
+
+    MCL_ONFAULTのmlockallは触れたページだけをロックするため、
+    消去時に初めて実行されるライブラリのコードも先に読み込んでおく。
+
+    Returns:
+        読み込んだマッピングの数
+    """
+    libc = _libc()
+    libc.madvise.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int)
+    populated = 0
+    with open('/proc/self/maps') as f:
+        for line in f:
+            # <start>-<end> <perms> <offset> <dev> <inode> <path>
+            parts = line.split(None, 5)
+            if len(parts) < 6 or 'r' not in parts[1] or '.so' not in parts[5]:
+                continue
+            start, _, end = parts[0].partition('-')
+            start = int(start, 16)
+            if libc.madvise(start, int(end, 16) - start, MADV_POPULATE_READ) == 0:
+                populated += 1
+    return populated
+
+
+# 消去処理の開始・完了を示すバナー（1つのログレコードとして出力）
+_BANNER_RULE = "=" * 60
+_START_BANNER = f"{_BANNER_RULE}\nSTARTING SECURE WIPE OPERATION\n{_BANNER_RULE}"
+_KEYFILE_DELETED_BANNER = (
+    f"{_BANNER_RULE}\nKEYFILE DELETED - Data is now PERMANENTLY UNRECOVERABLE\n{_BANNER_RULE}"
+)
 
 
 class SecureWiper:
@@ -21,6 +350,20 @@ class SecureWiper:
     LUKS暗号化されたUSBストレージのキーファイルを安全に削除する。
     """
 
+    # 外部コマンドの固定部分（引数は呼び出し時に追加）
+    _SMBD_STOP = ('systemctl', 'stop', 'smbd')
+    _SYSTEMCTL_STOP = ('systemctl', 'stop')
+    _SYSTEMCTL_IS_ACTIVE = ('systemctl', 'is-active')
+    _SYSTEMCTL_REBOOT = ('systemctl', 'reboot')
+    _FUSER_KILL = ('fuser', '-km')
+    _CRYPT_CLOSE = ('cryptsetup', 'close')
+    _FSTRIM = ('fstrim',)
+
+    _FSTAB = '/etc/fstab'
+
+    # 手動クリーンアップ（Samba停止〜LUKSクローズ）全体の最大待ち時間（秒）
+    TEARDOWN_TIMEOUT = 60
+
     def __init__(
         self,
         mount_point: str = '/mnt/secure_nas',
@@ -43,6 +386,42 @@ class SecureWiper:
         self.luks_name = luks_name
         self.logger = logging.getLogger(__name__)
 
+        # コマンド引数やシステムコールで使う文字列表現（呼び出しごとに変換しない）
+        self.mount_point_str = os.fspath(self.mount_point)
+        self.keyfile_str = os.fspath(self.keyfile)
+        self._mount_parent_str = os.path.dirname(self.mount_point_str)
+        self._mountinfo_target = _escape_mountinfo(self.mount_point_str)
+
+        # systemd マウントユニット名
+        # /mnt/secure_nas -> mnt-secure_nas.mount
+        self._mount_unit = self.mount_point_str.lstrip('/').replace('/', '-') + '.mount'
+
+        # 安全チェック時に読んだマウント状態（消去開始までの判定で再利用）
+        self._mounts: Optional[MountSnapshot] = None
+        # キーファイルのあるデバイス（安全チェックを繰り返しても一度だけ求める）
+        self._keyfile_device: Optional[str] = None
+        # 手動クリーンアップの期限（time.monotonic()、実行中以外はNone）
+        self._teardown_deadline: Optional[float] = None
+
+    def prefault(self):
+        """
+        消去処理で使うコマンドパス・ライブラリを事前に読み込む
+
+        メモリロックの前に呼び出し、数週間後の消去時にSDカードからの
+        読み込みを待たずに済むようにする。失敗しても消去処理は行える。
+        """
+        for argv in (self._SMBD_STOP, self._SYSTEMCTL_STOP, self._SYSTEMCTL_REBOOT,
+                     self._FUSER_KILL, self._CRYPT_CLOSE, self._FSTRIM):
+            _which(argv[0])
+        _libcryptsetup()
+
+        try:
+            populated = _populate_library_pages()
+        except (OSError, AttributeError) as e:
+            self.logger.debug(f"Could not prefault library pages: {e}")
+            return
+        self.logger.debug(f"Prefaulted {populated} library mappings")
+
     def verify_safe_to_wipe(self) -> Tuple[bool, List[str]]:
         """
         消去前の安全チェック
@@ -57,7 +436,13 @@ class SecureWiper:
             errors.append("Keyfile path is not specified")
 
         # 2. キーファイルが存在するか（警告のみ、クリーンアップ時は許容）
-        if not self.keyfile.exists():
+        # statは一度だけ行い、結果を後のチェックでも使う
+        try:
+            keyfile_stat = os.stat(self.keyfile_str)
+        except OSError:
+            keyfile_stat = None
+
+        if keyfile_stat is None:
             self.logger.warning(f"Keyfile {self.keyfile} does not exist - may have been already deleted")
             # クリーンアップのため、エラーとして扱わない
 
@@ -69,9 +454,20 @@ class SecureWiper:
         if self.device and not Path(self.device).exists():
             errors.append(f"Device {self.device} does not exist")
 
+        # ここまでで失敗していれば、外部コマンドを使うチェックは行わない
+        if errors:
+            return False, errors
+
+        # マウント状態は一度だけ読み、以降のチェックと消去処理で共有する
+        try:
+            self._mounts = MountSnapshot.capture()
+        except (OSError, ValueError) as e:
+            self.logger.debug(f"Could not read mountinfo: {e}")
+            self._mounts = None
+
         # 5. システムディスクではないか
         if self.device:
-            root_device = self._get_root_device()
+            root_device = self.root_device
             if self.device.startswith(root_device):
                 errors.append(
                     f"Cannot wipe system device {self.device} "
@@ -79,9 +475,13 @@ class SecureWiper:
                 )
 
         # 6. キーファイルがシステムディスク外にあるか（念のため）
-        if self.keyfile.exists():
+        if keyfile_stat is not None:
             try:
-                keyfile_device = self._get_device_for_path(self.keyfile)
+                if self._keyfile_device is None:
+                    self._keyfile_device = self._get_device_for_path(
+                        self.keyfile, st_dev=keyfile_stat.st_dev, mounts=self._mounts
+                    )
+                keyfile_device = self._keyfile_device
                 if keyfile_device != self.device:
                     # キーファイルはSDカード上にあるべき（正常）
                     pass
@@ -94,57 +494,82 @@ class SecureWiper:
 
         return len(errors) == 0, errors
 
-    def _get_root_device(self) -> str:
+    @functools.cached_property
+    def root_device(self) -> str:
         """
-        ルートファイルシステムのデバイスを取得
+        ルートファイルシステムのデバイスを取得（インスタンスごとに一度だけ求める）
 
         Returns:
             ルートデバイスのベース名（例: /dev/mmcblk0）
         """
         try:
-            result = subprocess.run(
-                ['findmnt', '-n', '-o', 'SOURCE', '/'],
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=10
-            )
-            device = result.stdout.strip()
-
             # パーティション番号を除去
-            # /dev/mmcblk0p2 -> /dev/mmcblk0
-            # /dev/sda1 -> /dev/sda
-            import re
-            base_device = re.sub(r'p?\d+$', '', device)
-            return base_device
+            return _PARTITION_SUFFIX_RE.sub('', _find_root_source())
 
-        except subprocess.CalledProcessError as e:
+        except (OSError, KeyError) as e:
             self.logger.error(f"Failed to get root device: {e}")
             return '/dev/mmcblk0'  # フォールバック（Raspberry Pi）
 
-    def _get_device_for_path(self, path: Path) -> str:
+    def _get_device_for_path(
+        self,
+        path: Path,
+        st_dev: Optional[int] = None,
+        mounts: Optional[MountSnapshot] = None
+    ) -> str:
         """
         指定されたパスが存在するデバイスを取得
 
         Args:
             path: ファイルパス
+            st_dev: 取得済みのst_dev（Noneの場合はstatする）
+            mounts: 取得済みのマウント状態（Noneの場合は読み込む）
 
         Returns:
             デバイスパス
         """
-        result = subprocess.run(
-            ['df', str(path)],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=10
-        )
-        lines = result.stdout.strip().split('\n')
-        if len(lines) < 2:
-            raise RuntimeError("Unexpected df output")
+        # dfを起動せず、st_devと/proc/self/mountinfoから求める
+        if mounts is None:
+            mounts = MountSnapshot.capture()
+        if st_dev is None:
+            st_dev = os.stat(path).st_dev
+        device = mounts.device_for(st_dev)
+        if device is not None:
+            return device
+
+        # btrfsのサブボリュームなどst_devがmountinfoと一致しない場合は
+        # パスを含む最も深いマウントポイントのマウント元を使う（dfと同じ判定）
+        mount_point = os.path.realpath(path)
+        while mount_point not in mounts.by_mount_point:
+            if mount_point == '/':
+                raise RuntimeError(f"No mount found for {path}")
+            mount_point = os.path.dirname(mount_point)
+        return mounts.by_mount_point[mount_point]
+
+    def _budget(self, timeout: float) -> float:
+        """
+        手動クリーンアップの期限を超えないよう待ち時間を切り詰める
+
+        Args:
+            timeout: 処理ごとの最大待ち時間（秒）
 
-        device = lines[1].split()[0]
-        return device
+        Returns:
+            実際に使う待ち時間（秒、期限を過ぎていても最低1秒）
+        """
+        if self._teardown_deadline is None:
+            return timeout
+        return max(1.0, min(timeout, self._teardown_deadline - time.monotonic()))
+
+    def _deadline_passed(self) -> bool:
+        """
+        手動クリーンアップの期限を過ぎたか確認
+
+        Returns:
+            期限を過ぎている場合True（クリーンアップ中でなければ常にFalse）
+        """
+        return (
+            self._teardown_deadline is not None
+            and time.monotonic() >= self._teardown_deadline
+        )
 
     def stop_samba(self) -> bool:
         """
@@ -153,20 +578,45 @@ class SecureWiper:
         Returns:
             成功した場合True
         """
+        return self._wait_stop_samba(self._start_stop_samba())
+
+    def _start_stop_samba(self) -> Optional[subprocess.Popen]:
+        """
+        Sambaサービスの停止を開始（完了は待たない）
+
+        Returns:
+            systemctlプロセス、起動できなかった場合None
+        """
         self.logger.info("Stopping Samba service")
 
         try:
-            subprocess.run(
-                ['systemctl', 'stop', 'smbd'],
-                check=False,  # 失敗しても続行
-                timeout=30
-            )
-            self.logger.info("Samba service stopped")
-            return True
+            return subprocess.Popen(self._SMBD_STOP, **_spawn_options(self._SMBD_STOP))
         except Exception as e:
             self.logger.warning(f"Failed to stop Samba (continuing anyway): {e}")
+            return None
+
+    def _wait_stop_samba(self, proc: Optional[subprocess.Popen]) -> bool:
+        """
+        Sambaサービスの停止完了を待つ
+
+        Args:
+            proc: _start_stop_sambaが返したプロセス
+
+        Returns:
+            成功した場合True（失敗しても続行するため常にTrue）
+        """
+        if proc is None:
             return True  # 失敗しても続行
 
+        try:
+            proc.wait(timeout=self._budget(30))
+            self.logger.info("Samba service stopped")
+        except Exception as e:
+            proc.kill()
+            proc.wait()
+            self.logger.warning(f"Failed to stop Samba (continuing anyway): {e}")
+        return True  # 失敗しても続行
+
     def is_mounted(self) -> bool:
         """
         マウントポイントがマウントされているか確認
@@ -174,73 +624,104 @@ class SecureWiper:
         Returns:
             マウントされている場合True
         """
+        if self._differs_from_parent():
+            return True
+
+        try:
+            with open('/proc/self/mountinfo', 'rb') as f:
+                return _mount_point_listed(f, self._mountinfo_target)
+        except OSError:
+            # mountinfoが読めない場合は親ディレクトリとのst_devの違いで判定
+            return os.path.ismount(self.mount_point_str)
+
+    def _differs_from_parent(self) -> bool:
+        """
+        マウントポイントと親ディレクトリのst_devが異なるか確認
+
+        マウント数によらずstat 2回で判定できる。同じファイルシステムの
+        バインドマウントは区別できないため、Falseの場合はmountinfoで確認する。
+
+        Returns:
+            st_devが異なる（マウントされている）場合True
+        """
         try:
-            result = subprocess.run(
-                ['mountpoint', '-q', str(self.mount_point)],
-                timeout=5
-            )
-            return result.returncode == 0
-        except Exception:
+            return os.stat(self.mount_point_str).st_dev != os.stat(self._mount_parent_str).st_dev
+        except OSError:
             return False
 
-    def prevent_auto_remount(self) -> bool:
+    def _wait_unmounted(self, timeout: float = 2.0) -> bool:
+        """
+        マウントポイントがアンマウントされるまで待つ
+
+        /proc/self/mountinfo はマウントテーブルが変わるとPOLLPRIを通知するため、
+        一定間隔で眠らずに変化した時点で確認する。
+
+        Args:
+            timeout: 最大待ち時間（秒）
+
+        Returns:
+            アンマウントされた場合True
+        """
+        timeout = self._budget(timeout)
+        try:
+            # 開き直さず、同じファイルを先頭から読み直す
+            with open('/proc/self/mountinfo', 'rb') as f:
+                poller = select.poll()
+                poller.register(f, select.POLLPRI)
+                deadline = time.monotonic() + timeout
+                while (
+                    self._differs_from_parent()
+                    or _mount_point_listed(f, self._mountinfo_target)
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    # 通知が来ない場合に備えて待ち時間の上限は短くしておく
+                    poller.poll(min(remaining, 0.05) * 1000)
+                return True
+        except OSError:
+            return _wait_until(lambda: not os.path.ismount(self.mount_point_str), timeout)
+
+    def _try_umount(self) -> bool:
+        """
+        通常のアンマウントを一度試す
+
+        Returns:
+            umount2が成功した場合True
+        """
+        try:
+            _umount2(self.mount_point_str)
+            return True
+        except OSError:
+            return False
+
+    def prevent_auto_remount(self, fstab_removed: bool = False) -> bool:
         """
         systemdによる自動再マウントを防止
 
         /etc/fstab のエントリを削除し、systemd マウントユニットを停止する。
         システム再起動後は fstab エントリがないため、マウントユニットは自動生成されない。
 
+        Args:
+            fstab_removed: fstabのエントリを削除済みの場合True
+
         Returns:
             成功した場合True
         """
-        try:
-            # fstab 削除前に内容を確認
-            self.logger.info("Reading current fstab entries...")
-            result = subprocess.run(
-                ['grep', str(self.mount_point), '/etc/fstab'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                self.logger.info(f"Found fstab entry: {result.stdout.strip()}")
-            else:
-                self.logger.warning("Mount point not found in fstab (already removed?)")
-
-            # fstab からマウントポイントのエントリを削除
-            self.logger.info("Removing fstab entry to prevent auto-remount after reboot")
-            result = subprocess.run(
-                ['sed', '-i', f'\\|{str(self.mount_point)}|d', '/etc/fstab'],
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=10
-            )
-
-            # 削除を確認
-            self.logger.info("Verifying fstab entry removal...")
-            verify = subprocess.run(
-                ['grep', str(self.mount_point), '/etc/fstab'],
-                capture_output=True,
-                timeout=5
-            )
-            if verify.returncode == 0:
-                self.logger.error("FAILED: fstab entry still exists after deletion!")
-                return False
-            else:
-                self.logger.info("✓ Fstab entry successfully removed")
+        if not fstab_removed and not self._remove_fstab_entry():
+            return False
 
+        try:
             # systemd マウントユニットを停止（即座にアンマウント）
-            # /mnt/secure_nas -> mnt-secure_nas.mount
-            mount_unit = str(self.mount_point).lstrip('/').replace('/', '-') + '.mount'
+            mount_unit = self._mount_unit
 
             self.logger.info(f"Stopping systemd mount unit: {mount_unit}")
-            stop_result = subprocess.run(
-                ['systemctl', 'stop', mount_unit],
+            stop_result = _run(
+                (*self._SYSTEMCTL_STOP, mount_unit),
                 capture_output=True,
                 text=True,
                 check=False,
-                timeout=10
+                timeout=self._budget(10)
             )
             if stop_result.returncode == 0:
                 self.logger.info(f"✓ Successfully stopped {mount_unit}")
@@ -251,19 +732,66 @@ class SecureWiper:
             self.logger.info("✓ Auto-remount prevention configured successfully")
             return True
 
-        except subprocess.CalledProcessError as e:
+        except Exception as e:
+            self.logger.error(f"Unexpected error in prevent_auto_remount: {e}")
+            return False
+
+    def _remove_fstab_entry(self) -> bool:
+        """
+        /etc/fstab からマウントポイントのエントリを削除
+
+        Returns:
+            成功した場合True
+        """
+        try:
+            # fstab 削除前に内容を確認
+            self.logger.info("Reading current fstab entries...")
+            with open(self._FSTAB) as f:
+                lines = f.readlines()
+
+            # マウントポイントを含む行を削除（sed '\|<mount point>|d' と同じ判定）
+            kept = [line for line in lines if self.mount_point_str not in line]
+            if len(kept) == len(lines):
+                self.logger.warning("Mount point not found in fstab (already removed?)")
+                return True
+
+            for line in lines:
+                if self.mount_point_str in line:
+                    self.logger.info("Found fstab entry: %s", line.strip())
+
+            # 一時ファイルに書き出してから置き換え（途中で失敗してもfstabを壊さない）
+            self.logger.info("Removing fstab entry to prevent auto-remount after reboot")
+            st = os.stat(self._FSTAB)
+            temp_file = self._FSTAB + '.tmp'
+            fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC,
+                         st.st_mode & 0o7777)
+            try:
+                with open(fd, 'w', closefd=False) as f:
+                    f.writelines(kept)
+                os.fchown(fd, st.st_uid, st.st_gid)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            os.replace(temp_file, self._FSTAB)
+
+            # 書き込んだ内容から除外済みのため、読み直しての確認は不要
+            self.logger.info(f"✓ Removed {len(lines) - len(kept)} fstab entries")
+            return True
+
+        except OSError as e:
             self.logger.error(f"Failed to prevent auto-remount: {e}")
-            if e.stderr:
-                self.logger.error(f"  stderr: {e.stderr.strip()}")
             return False
         except Exception as e:
             self.logger.error(f"Unexpected error in prevent_auto_remount: {e}")
             return False
 
-    def unmount_filesystem(self) -> bool:
+    def unmount_filesystem(self, fstab_removed: bool = False) -> bool:
         """
         ファイルシステムをアンマウント（強制）
 
+        Args:
+            fstab_removed: fstabのエントリを削除済みの場合True
+
         Returns:
             成功した場合True
         """
@@ -276,34 +804,27 @@ class SecureWiper:
 
         # CRITICAL: systemd による自動再マウントを**先に**防止
         self.logger.info("Preventing systemd auto-remount BEFORE unmounting...")
-        if not self.prevent_auto_remount():
+        if not self.prevent_auto_remount(fstab_removed=fstab_removed):
             self.logger.error("CRITICAL: Failed to prevent auto-remount")
             self.logger.error("Continuing anyway, but remount may occur")
 
         try:
             # 通常のアンマウントを試行
             self.logger.info("Attempting normal unmount...")
-            subprocess.run(
-                ['umount', str(self.mount_point)],
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=30
-            )
-            self.logger.info("umount command succeeded")
-            time.sleep(1)
+            _umount2(self.mount_point_str)
+            self.logger.info("umount2 succeeded")
 
             # 検証：本当にアンマウントされたか確認
-            if not self.is_mounted():
+            if self._wait_unmounted():
                 self.logger.info(f"✓ Successfully unmounted {self.mount_point}")
 
                 # さらに検証: systemd マウントユニットの状態確認
-                mount_unit = str(self.mount_point).lstrip('/').replace('/', '-') + '.mount'
-                check = subprocess.run(
-                    ['systemctl', 'is-active', mount_unit],
+                mount_unit = self._mount_unit
+                check = _run(
+                    (*self._SYSTEMCTL_IS_ACTIVE, mount_unit),
                     capture_output=True,
                     text=True,
-                    timeout=5
+                    timeout=self._budget(5)
                 )
                 if check.returncode == 0:
                     self.logger.error(f"WARNING: {mount_unit} is still active!")
@@ -316,20 +837,12 @@ class SecureWiper:
                 self.logger.error("Possible systemd auto-remount occurred")
 
                 # デバッグ情報を記録
-                mount_info = subprocess.run(
-                    ['mount'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                for line in mount_info.stdout.split('\n'):
-                    if str(self.mount_point) in line:
-                        self.logger.error(f"  Current mount: {line}")
+                for mount_point, source in MountSnapshot.capture().by_mount_point.items():
+                    if self.mount_point_str in mount_point:
+                        self.logger.error("  Current mount: %s on %s", source, mount_point)
 
-        except subprocess.CalledProcessError as e:
+        except OSError as e:
             self.logger.warning(f"Normal unmount failed: {e}")
-            if e.stderr:
-                self.logger.warning(f"  umount stderr: {e.stderr.strip()}")
 
             # CRITICAL: umount が失敗しても、実際にアンマウントされているか確認
             # systemctl stop が既にアンマウントした場合、umount は "not mounted" で失敗するが
@@ -342,63 +855,36 @@ class SecureWiper:
             self.logger.warning("Filesystem is still mounted - proceeding to forced unmount")
 
         # 強制アンマウント試行1: プロセスをkillしてから通常アンマウント
+        # killされたプロセスが終了してマウントポイントが解放されるまでumount2を繰り返す
+        self.logger.info("Killing processes using mount point...")
         try:
-            self.logger.info("Killing processes using mount point...")
-            subprocess.run(
-                ['fuser', '-km', str(self.mount_point)],
+            _run(
+                (*self._FUSER_KILL, self.mount_point_str),
                 check=False,  # fuserが何も見つからなくてもOK
-                timeout=10,
+                timeout=self._budget(10),
                 capture_output=True
             )
-            time.sleep(2)
-
-            subprocess.run(
-                ['umount', str(self.mount_point)],
-                check=True,
-                timeout=30
-            )
-            time.sleep(1)
-
-            if not self.is_mounted():
-                self.logger.info(f"Successfully unmounted {self.mount_point} (after killing processes)")
-                return True
-
-        except subprocess.CalledProcessError:
-            self.logger.warning("Forceful unmount after kill failed, trying lazy unmount")
-
-        # 強制アンマウント試行2: lazy unmount (-l)
-        try:
-            subprocess.run(
-                ['umount', '-l', str(self.mount_point)],
-                check=True,
-                timeout=30
-            )
-            time.sleep(2)
-
-            if not self.is_mounted():
-                self.logger.info(f"Successfully unmounted {self.mount_point} (lazy)")
-                return True
-            else:
-                self.logger.error("Lazy unmount succeeded but mount point still reports as mounted")
+        except Exception as e:
+            self.logger.warning(f"fuser failed: {e}")
 
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"Failed to unmount even with -l flag: {e}")
+        if _wait_until(self._try_umount, timeout=self._budget(2.0), interval=0.05) and self._wait_unmounted():
+            self.logger.info(f"Successfully unmounted {self.mount_point} (after killing processes)")
+            return True
+        self.logger.warning("Forceful unmount after kill failed, trying lazy unmount")
 
-        # 強制アンマウント試行3: 強制フラグ (-f) - NFSなどで有効
-        try:
-            subprocess.run(
-                ['umount', '-f', str(self.mount_point)],
-                check=True,
-                timeout=30
-            )
-            time.sleep(2)
+        # 強制アンマウント試行2: lazy unmount (MNT_DETACH)
+        # 試行3: 強制フラグ (MNT_FORCE) - NFSなどで有効
+        for flags, label in ((MNT_DETACH, 'lazy'), (MNT_FORCE | MNT_DETACH, 'force')):
+            try:
+                _umount2(self.mount_point_str, flags)
+            except OSError as e:
+                self.logger.error(f"Failed to unmount ({label}): {e}")
+                continue
 
-            if not self.is_mounted():
-                self.logger.info(f"Successfully unmounted {self.mount_point} (force)")
+            if self._wait_unmounted():
+                self.logger.info(f"Successfully unmounted {self.mount_point} ({label})")
                 return True
-
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"Failed to unmount with -f flag: {e}")
+            self.logger.error(f"{label.capitalize()} unmount succeeded but mount point still reports as mounted")
 
         # 最終確認
         if not self.is_mounted():
@@ -420,29 +906,70 @@ class SecureWiper:
         self.logger.info(f"Closing LUKS device: {self.luks_name}")
 
         try:
-            subprocess.run(
-                ['cryptsetup', 'close', self.luks_name],
-                check=True,
-                timeout=30
-            )
+            # 期限切れの場合は、中断できるようタイムアウト付きのcryptsetupを使う
+            lib = _libcryptsetup()
+            if lib is not None and not self._deadline_passed():
+                self._deactivate_with_timeout(lib, self._budget(30))
+            else:
+                _run(
+                    (*self._CRYPT_CLOSE, self.luks_name),
+                    check=True,
+                    timeout=self._budget(30)
+                )
 
-            time.sleep(1)
+            # デバイスマッパーのノードが消えるまで短い間隔で確認
+            mapper = Path('/dev/mapper') / self.luks_name
+            _wait_until(lambda: not mapper.exists())
 
             self.logger.info(f"Successfully closed LUKS device: {self.luks_name}")
             return True
 
-        except subprocess.CalledProcessError as e:
+        except (OSError, subprocess.CalledProcessError) as e:
             self.logger.warning(f"Failed to close LUKS device: {e}")
             # クローズ失敗でも続行（キーファイル削除とヘッダー破壊が重要）
             self.logger.warning("Continuing with wipe despite close failure")
             return True
 
-    def shred_keyfile(self, passes: int = 3) -> bool:
+    def _deactivate_with_timeout(self, lib: ctypes.CDLL, timeout: float):
         """
-        キーファイルをshredで完全削除
+        libcryptsetupでのクローズを待ち時間の上限付きで行う
+
+        ライブラリ呼び出しは中断できないため別スレッドで実行し、
+        時間内に終わらなければ待たずに続行する（スレッドはデーモンとして残す）。
 
         Args:
-            passes: 上書き回数（デフォルト: 3）
+            lib: _libcryptsetup() が返したライブラリ
+            timeout: 最大待ち時間（秒）
+
+        Raises:
+            OSError: クローズに失敗した場合、またはタイムアウトした場合
+        """
+        errors = []
+
+        def deactivate():
+            try:
+                _crypt_deactivate(lib, self.luks_name)
+            except OSError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=deactivate, name='crypt-deactivate', daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            raise TimeoutError(f"crypt_deactivate did not finish within {timeout:.0f}s")
+        if errors:
+            raise errors[0]
+
+    def shred_keyfile(self, passes: int = 1) -> bool:
+        """
+        キーファイルを上書きしてから削除
+
+        ランダムデータで上書きしてから削除する。回転型ディスクでは最後にゼロでも上書きする。
+        フラッシュメディアでは上書きをランダム1回に限ってゼロでの上書きを省き、
+        削除後にfstrimでTRIMを行う。
+
+        Args:
+            passes: ランダムデータでの上書き回数（デフォルト: 1、フラッシュでは最大1）
 
         Returns:
             成功した場合True
@@ -450,34 +977,90 @@ class SecureWiper:
         self.logger.critical(f"Shredding keyfile: {self.keyfile}")
 
         try:
-            subprocess.run(
-                [
-                    'shred',
-                    '-v',           # verbose
-                    '-n', str(passes),  # 上書き回数
-                    '-z',           # 最後にゼロで上書き
-                    '-u',           # 削除
-                    str(self.keyfile)
-                ],
-                check=True,
-                timeout=300  # 5分タイムアウト
-            )
+            fd = os.open(self.keyfile_str, os.O_WRONLY | os.O_CLOEXEC)
+            try:
+                st = os.fstat(fd)
+                size = st.st_size
+
+                # フラッシュでは複数回の上書きは同じセルに届かず、書き込み量が増えるだけ
+                rotational = _is_rotational(st.st_dev)
+                if rotational is False and passes > 1:
+                    self.logger.info("Keyfile is on flash storage, using a single overwrite pass")
+                    passes = 1
+
+                for i in range(passes):
+                    self._overwrite(fd, size, os.urandom)
+                    self.logger.info("Keyfile overwrite pass %d/%d completed", i + 1, passes)
+                # ゼロでの上書きは痕跡を隠すためのもので、フラッシュでは書き込みが増えるだけ
+                if rotational is not False:
+                    self._overwrite(fd, size, bytes)
+            finally:
+                os.close(fd)
+
+            os.unlink(self.keyfile_str)
 
             self.logger.critical(f"Keyfile {self.keyfile} has been securely deleted")
-            return True
-
-        except subprocess.TimeoutExpired:
-            self.logger.error("Keyfile shred operation timed out")
-            return False
-        except subprocess.CalledProcessError as e:
+        except OSError as e:
             self.logger.error(f"Keyfile shred operation failed: {e}")
             return False
 
+        # 削除したブロックをTRIM（失敗しても削除自体は完了している）
+        # 回転型ディスクにはTRIMがないため行わない
+        if not rotational:
+            self._trim_filesystem(os.path.dirname(self.keyfile_str))
+        return True
+
+    def _overwrite(self, fd: int, size: int, fill):
+        """
+        ファイル全体を上書きしてディスクに書き出す
+
+        Args:
+            fd: 書き込み用ファイルディスクリプタ
+            size: ファイルサイズ
+            fill: 指定バイト数の書き込みデータを返す関数（os.urandom / bytes）
+        """
+        offset = 0
+        while offset < size:
+            length = min(size - offset, 1024 * 1024)
+            offset += os.pwrite(fd, fill(length), offset)
+        # サイズは変わらないため、データブロックだけを書き出せば十分
+        # （mtimeなどのメタデータ更新のジャーナルコミットを待たない）
+        os.fdatasync(fd)
+
+    def _trim_filesystem(self, path: str):
+        """
+        指定パスを含むファイルシステムでfstrimを実行
+
+        Args:
+            path: ファイルシステム上のパス
+        """
+        # fstrimにはマウントポイントを渡す
+        mount_point = os.path.realpath(path)
+        while not os.path.ismount(mount_point):
+            mount_point = os.path.dirname(mount_point)
+
+        try:
+            result = _run(
+                (*self._FSTRIM, mount_point),
+                capture_output=True,
+                text=True,
+                check=False,
+                timeout=10
+            )
+            if result.returncode == 0:
+                self.logger.info(f"Trimmed free blocks on {mount_point}")
+            else:
+                self.logger.warning(
+                    f"fstrim {mount_point} failed (not critical): {result.stderr.strip()}"
+                )
+        except Exception as e:
+            self.logger.warning(f"fstrim {mount_point} failed (not critical): {e}")
+
     def execute_secure_wipe(self, reboot_after: bool = False) -> bool:
         """
         セキュア消去を実行
 
-        キーファイルを shred で完全削除することで、LUKS 暗号化されたデータを
+        キーファイルを上書き削除することで、LUKS 暗号化されたデータを
         永久に復元不可能にする。ヘッダー削除は不要（キーなしでは復号不可能）。
 
         Args:
@@ -486,16 +1069,14 @@ class SecureWiper:
         Returns:
             成功した場合True
         """
-        self.logger.critical("=" * 60)
-        self.logger.critical("STARTING SECURE WIPE OPERATION")
-        self.logger.critical("=" * 60)
+        self.logger.critical(_START_BANNER)
 
         # 安全性チェック
         safe, errors = self.verify_safe_to_wipe()
         if not safe:
             self.logger.error("Safety checks failed:")
             for error in errors:
-                self.logger.error(f"  - {error}")
+                self.logger.error("  - %s", error)
             raise RuntimeError(f"Safety checks failed: {', '.join(errors)}")
 
         self.logger.info("All safety checks passed")
@@ -503,16 +1084,14 @@ class SecureWiper:
         # ステップ1: キーファイルを完全削除（最優先で実行）
         # これを最初に実行することで、以降の処理が失敗してもデータ復元を確実に防ぐ
         # キーファイルを削除すれば、LUKS暗号化されたデータは永久に復元不可能
-        if self.keyfile.exists():
+        if os.path.exists(self.keyfile_str):
             if not self.shred_keyfile():
                 self.logger.error("Failed to shred keyfile - manual cleanup may be required")
                 raise RuntimeError("Failed to shred keyfile")
         else:
             self.logger.warning(f"Keyfile {self.keyfile} already deleted - skipping shred")
 
-        self.logger.critical("=" * 60)
-        self.logger.critical("KEYFILE DELETED - Data is now PERMANENTLY UNRECOVERABLE")
-        self.logger.critical("=" * 60)
+        self.logger.critical(_KEYFILE_DELETED_BANNER)
 
         # ステップ2: 即座にシステム再起動
         # 再起動により、Samba/マウント/LUKSデバイスが自動的にクリーンアップされる
@@ -520,42 +1099,56 @@ class SecureWiper:
         if reboot_after:
             self.logger.critical("Rebooting system immediately...")
             self.logger.critical("All services will be stopped automatically on reboot")
-            subprocess.run(['systemctl', 'reboot'])
+            _run(self._SYSTEMCTL_REBOOT)
             # Note: この後のコードは実行されない（再起動により中断）
         else:
             # 再起動しない場合のみ、手動クリーンアップを実行
             self.logger.warning("Reboot disabled - performing manual cleanup")
 
-            # Sambaサービスを停止
-            self.stop_samba()
-
-            # ファイルシステムをアンマウント（強制）
-            unmount_success = self.unmount_filesystem()
-
-            # マウントポイント内のゴーストファイルを削除
-            if unmount_success:
-                try:
-                    import glob
-                    ghost_files = glob.glob(f"{self.mount_point}/*") + glob.glob(f"{self.mount_point}/.[!.]*")
-                    if ghost_files:
-                        self.logger.warning(f"Cleaning up {len(ghost_files)} ghost files in unmounted mount point")
-                        subprocess.run(
-                            ['rm', '-rf'] + ghost_files,
-                            check=True,
-                            timeout=30
-                        )
-                        self.logger.info("Ghost files removed from mount point")
-                    else:
-                        self.logger.info("No ghost files found in mount point")
-                except Exception as e:
-                    self.logger.warning(f"Failed to clean ghost files (not critical): {e}")
-            else:
-                self.logger.critical("SKIPPING ghost file cleanup - mount point is still mounted (unsafe)")
+            # 手動クリーンアップ全体で一つの期限を共有し、各処理には残り時間だけ待たせる
+            self._teardown_deadline = time.monotonic() + self.TEARDOWN_TIMEOUT
+            try:
+                # Sambaサービスの停止を開始し、完了を待つ間にfstabのエントリを削除しておく
+                # （アンマウントはSambaが共有内のファイルを閉じてから行う）
+                samba_stop = self._start_stop_samba()
+                # （消去開始後にマウント状態は変わっていないため、安全チェック時の状態を使う）
+                mounted = (
+                    self._mounts.is_mounted(self.mount_point_str)
+                    if self._mounts is not None else self.is_mounted()
+                )
+                fstab_removed = mounted and self._remove_fstab_entry()
+                self._wait_stop_samba(samba_stop)
+
+                # ファイルシステムをアンマウント（強制）
+                unmount_success = self.unmount_filesystem(fstab_removed=fstab_removed)
+
+                # マウントポイント内のゴーストファイルを削除
+                if unmount_success:
+                    try:
+                        with os.scandir(self.mount_point_str) as it:
+                            ghost_files = list(it)
+                        if ghost_files:
+                            self.logger.warning(f"Cleaning up {len(ghost_files)} ghost files in unmounted mount point")
+                            # rmを起動せずに削除（d_typeを使うため要素ごとのstatは不要）
+                            for entry in ghost_files:
+                                if entry.is_dir(follow_symlinks=False):
+                                    shutil.rmtree(entry.path)
+                                else:
+                                    os.unlink(entry.path)
+                            self.logger.info("Ghost files removed from mount point")
+                        else:
+                            self.logger.info("No ghost files found in mount point")
+                    except Exception as e:
+                        self.logger.warning(f"Failed to clean ghost files (not critical): {e}")
+                else:
+                    self.logger.critical("SKIPPING ghost file cleanup - mount point is still mounted (unsafe)")
 
-            # LUKSデバイスをクローズ
-            self.close_luks_device()
+                # LUKSデバイスをクローズ
+                self.close_luks_device()
 
-            self.logger.critical("Manual cleanup completed")
+                self.logger.critical("Manual cleanup completed")
+            finally:
+                self._teardown_deadline = None
 
         return True
 